@@ -1,6 +1,7 @@
 from __future__ import annotations
+import json
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 import joblib
 import numpy as np
@@ -8,11 +9,12 @@ import pandas as pd
 import streamlit as st
 
 from preprocess import extract_text_from_pdf, extract_fields_from_text, build_features
-from fraud_match_model import fraud_score, fraud_label_from_score
+from fraud_match_model import fraud_score, fraud_label_from_score, positive_class_index
 from triage import triage
+from forest_infer import compile_forest
+from train_model import COMPLEXITY_FEATURES, FEATURE_UNION, FRAUD_FEATURES, SEVERITY_FEATURES
 
 BASE = Path(__file__).resolve().parent
-DATA = BASE / "data"
 MODELS = BASE / "models"
 
 
@@ -23,38 +25,75 @@ def load_models():
         p = MODELS / f"{name}.pkl"
         if p.exists():
             try:
-                models[name] = joblib.load(p)
+                models[name] = compile_forest(joblib.load(p))
             except Exception:
                 pass
+    # Resolve the positive-class column once instead of on every prediction
+    if models.get("fraud_model") is not None:
+        models["fraud_pos_idx"] = positive_class_index(models["fraud_model"])
+    # category_id order saved by train_model.py alongside the models; falls back to the same sorted order
+    categories_json = MODELS / "categories.json"
+    models["categories"] = json.loads(categories_json.read_text()) if categories_json.exists() else sorted(["accident","health"])
     return models
 
 
-def _detect_category(ac_text: Optional[str], pr_text: Optional[str], lr_text: Optional[str]) -> str:
-    # Simple keyword-based scorer across texts
-    texts = "\n".join([t or "" for t in (ac_text, pr_text, lr_text)]).lower()
-    scores = {k: 0.0 for k in ["accident","health"]}
+@st.cache_data(show_spinner=False)
+def _parse_pdf(data: bytes, source: str) -> Dict:
+    # Keyed on the PDF bytes, so re-clicking Analyze on the same files skips extraction
+    text = extract_text_from_pdf(data)
+    fields = extract_fields_from_text(text, source)
+    fields['raw_text'] = text
+    return fields
 
-    def has(*words):
-        return any(w.lower() in texts for w in words)
 
-    def add(cat, val):
-        scores[cat] += val
+def process_upload(file, source):
+    if not file:
+        return None
+    # Parse straight from the uploaded bytes; no temp file round-trip
+    fields = _parse_pdf(file.getvalue(), source)
+    fields['path'] = file.name
+    return fields
 
-    # Accident (auto)
-    if has("accident claim form", "police report", "loss/assessment report", "registration", "rear collision", "vehicle"):
-        add("accident", 2.0)
-    if has("registration: ", "rear", "bumper", "garage", "repair"):
-        add("accident", 1.0)
 
+# Category keyword rules: (keywords, category, weight). Keywords are stored
+# lowercase so matching against the lowercased text needs no per-call work.
+CATEGORY_RULES = (
+    # Accident (auto)
+    (("accident claim form", "police report", "loss/assessment report", "registration", "rear collision", "vehicle"), "accident", 2.0),
+    (("registration: ", "rear", "bumper", "garage", "repair"), "accident", 1.0),
     # Health
-    if has("hospital", "diagnosis", "medical", "treatment", "admission"):
-        add("health", 2.0)
+    (("hospital", "diagnosis", "medical", "treatment", "admission"), "health", 2.0),
+    (("hospitalization", "surgery", "outpatient", "medical", "diagnosis"), "health", 1.5),
+    (("rear collision",), "accident", 1.5),
+)
 
-    # Health
-    if has("hospitalization", "surgery", "outpatient", "medical", "diagnosis"):
-        add("health", 1.5)
-    if has("rear collision"):
-        add("accident", 1.5)
+try:
+    # Optional: one linear Aho-Corasick pass finds every keyword at once
+    import ahocorasick
+    _KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for _words, _, _ in CATEGORY_RULES:
+        for _w in _words:
+            _KEYWORD_AUTOMATON.add_word(_w, _w)
+    _KEYWORD_AUTOMATON.make_automaton()
+except ImportError:
+    _KEYWORD_AUTOMATON = None
+
+
+def _matched_keywords(texts: str) -> set:
+    if _KEYWORD_AUTOMATON is not None:
+        return {kw for _, kw in _KEYWORD_AUTOMATON.iter(texts)}
+    return {w for words, _, _ in CATEGORY_RULES for w in words if w in texts}
+
+
+def _detect_category(ac_text: Optional[str], pr_text: Optional[str], lr_text: Optional[str]) -> str:
+    # Simple keyword-based scorer across texts
+    texts = "\n".join([t or "" for t in (ac_text, pr_text, lr_text)]).lower()
+    scores = {k: 0.0 for k in ["accident","health"]}
+
+    found = _matched_keywords(texts)
+    for words, cat, weight in CATEGORY_RULES:
+        if not found.isdisjoint(words):
+            scores[cat] += weight
 
     # Choose best
     best = max(scores.items(), key=lambda kv: kv[1])
@@ -62,6 +101,22 @@ def _detect_category(ac_text: Optional[str], pr_text: Optional[str], lr_text: Op
     return best[0] if best[1] > 0 else "accident"
 
 
+# Union of model inputs; each model reads its own columns, looked up by name in
+# train_model.py's feature lists so a reorder there cannot feed the wrong columns.
+ALL_FEATS = FEATURE_UNION
+FRAUD_IDX = np.array([ALL_FEATS.index(f) for f in FRAUD_FEATURES])
+SEV_IDX = np.array([ALL_FEATS.index(f) for f in SEVERITY_FEATURES])
+CX_IDX = np.array([ALL_FEATS.index(f) for f in COMPLEXITY_FEATURES])
+
+
+def _feature_matrix(feats: Dict, category: str, categories: List[str]) -> np.ndarray:
+    """Single (1, len(ALL_FEATS)) row shared by all three models."""
+    row = dict(feats)
+    row['severity_numeric'] = {"Low":1,"Medium":2,"High":3}.get(row.get('severity_level','Low'),1)
+    row['category_id'] = categories.index(category) if category in categories else 0
+    return np.array([[row.get(k, 0.0) for k in ALL_FEATS]], dtype=np.float64)
+
+
 def predict_from_docs(acord: Optional[Dict], police: Optional[Dict], loss: Optional[Dict], rc: Optional[Dict], dl: Optional[Dict], hospital: Optional[Dict], category: Optional[str] = None):
     # Build feature row
     ac_s = pd.Series(acord or {})
@@ -80,54 +135,37 @@ def predict_from_docs(acord: Optional[Dict], police: Optional[Dict], loss: Optio
     models = load_models()
     proba = None
     ml_label = None
+    # category id mapping must match train mapping (alphabetical order)
+    detected = category or _detect_category(
+        (acord or {}).get('raw_text'), (police or {}).get('raw_text'), (loss or {}).get('raw_text')
+    )
+    full = _feature_matrix(feats, detected, models['categories'])
     if models.get('fraud_model') is not None:
-        features = [
-            'damage_difference','injury_mismatch','date_difference_days',
-            'location_match','vehicle_match','rc_match','dl_match','fraud_inconsistency_score',
-            'severity_level','complexity_score'
-        ]
-        # severity to numeric
-        row = feats.copy()
-        row['severity_numeric'] = {"Low":1,"Medium":2,"High":3}.get(row.get('severity_level','Low'),1)
-        # category id mapping must match train mapping (alphabetical order)
-        detected = category or _detect_category(
-            (acord or {}).get('raw_text'), (police or {}).get('raw_text'), (loss or {}).get('raw_text')
-        )
-        cat_list = sorted(["accident","health"]) 
-        row['category_id'] = cat_list.index(detected) if detected in cat_list else 0
-        X = pd.DataFrame([{k: row.get(k) for k in [
-            'damage_difference','injury_mismatch','date_difference_days',
-            'location_match','vehicle_match','rc_match','dl_match','patient_match','hospital_match','fraud_inconsistency_score',
-            'severity_numeric','complexity_score','category_id']}]).astype(float)
+        X = full[:, FRAUD_IDX]
         model = models['fraud_model']
         if hasattr(model, 'predict_proba'):
             probs = model.predict_proba(X)[0]
-            classes = list(getattr(model, 'classes_', []))
-            if 1 in classes:
-                proba = float(probs[classes.index(1)])
+            # predict() is argmax over predict_proba; reuse it instead of a second pass
+            ml_label = int(model.classes_[probs.argmax()])
+            pos_idx = models['fraud_pos_idx']
+            if pos_idx >= 0:
+                proba = float(probs[pos_idx])
             else:
-                # Model trained with a single class; fallback to 0.0 or 1.0 accordingly
-                if len(classes) == 1:
-                    proba = 1.0 if classes[0] == 1 else 0.0
+                # Model trained without the fraud class; fallback to 0.0 or max proba
+                if len(probs) == 1:
+                    proba = 0.0
                 else:
                     proba = float(probs.max())
-        ml_label = int(model.predict(X)[0])
+        else:
+            ml_label = int(model.predict(X)[0])
     
     # Severity/Complexity model outputs
     sev_pred = None
     cx_pred = None
     if models.get('severity_model') is not None:
-        Xs = pd.DataFrame([{k: row.get(k) for k in [
-            'damage_difference','injury_mismatch','date_difference_days',
-            'location_match','vehicle_match','rc_match','dl_match','patient_match','hospital_match','fraud_inconsistency_score',
-            'complexity_score','category_id']}]).astype(float)
-        sev_pred = str(models['severity_model'].predict(Xs)[0])
+        sev_pred = str(models['severity_model'].predict(full[:, SEV_IDX])[0])
     if models.get('complexity_model') is not None:
-        Xc = pd.DataFrame([{k: row.get(k) for k in [
-            'damage_difference','injury_mismatch','date_difference_days',
-            'location_match','vehicle_match','rc_match','dl_match','patient_match','hospital_match','fraud_inconsistency_score',
-            'severity_numeric','category_id']}]).astype(float)
-        cx_pred = float(models['complexity_model'].predict(Xc)[0])
+        cx_pred = float(models['complexity_model'].predict(full[:, CX_IDX])[0])
 
     return feats, h_score, h_label, proba, ml_label, sev_pred, cx_pred, detected
 
@@ -170,18 +208,6 @@ def main():
         st.subheader("Upload documents")
         acord_file = st.file_uploader("ACORD form (PDF)", type=["pdf"], key="ac")
 
-        def process_upload(file, source):
-            if not file:
-                return None
-            tmp = DATA / f"_tmp_{source}.pdf"
-            tmp.parent.mkdir(parents=True, exist_ok=True)
-            tmp.write_bytes(file.read())
-            text = extract_text_from_pdf(tmp)
-            fields = extract_fields_from_text(text, source)
-            fields['path'] = str(tmp)
-            fields['raw_text'] = text
-            return fields
-
         acord = process_upload(acord_file, 'acord')
         police = None
         loss = None
@@ -235,6 +261,8 @@ def main():
         if st.button("Retrain from merged_dataset.csv"):
             import subprocess, sys
             proc = subprocess.run([sys.executable, str(BASE / 'train_model.py')], capture_output=True, text=True)
+            # New pickles and categories.json on disk: drop the cached models so the next run loads them
+            load_models.clear()
             st.code(proc.stdout + "\n" + proc.stderr)
 
     st.markdown("---")
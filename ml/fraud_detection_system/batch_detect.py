@@ -1,23 +1,28 @@
 from __future__ import annotations
 import argparse
+import importlib.util
 from pathlib import Path
 from typing import Optional, List, Dict
 
 import joblib
+import numpy as np
 import pandas as pd
 
-from fraud_match_model import fraud_score, fraud_label_from_score
+from fraud_match_model import fraud_score_vec, positive_class_index
+from forest_infer import compile_forest
 
 BASE = Path(__file__).resolve().parent
 DATA = BASE / "data"
 MODELS = BASE / "models"
+# pyarrow's multithreaded CSV reader when installed, else pandas' C parser
+CSV_ENGINE = "pyarrow" if importlib.util.find_spec("pyarrow") else "c"
 
 
 def load_model() -> Optional[object]:
     p = MODELS / "fraud_model.pkl"
     if p.exists():
         try:
-            return joblib.load(p)
+            return compile_forest(joblib.load(p))
         except Exception as e:
             print(f"Warning: failed to load model {p}: {e}")
     return None
@@ -29,14 +34,13 @@ def ensure_severity_numeric(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def predict_ml(model, X: pd.DataFrame) -> (List[int], Optional[List[float]]):
+def predict_ml(model, X: np.ndarray, pos_idx: int) -> (List[int], Optional[List[float]]):
     y_pred = model.predict(X)
     probs = None
     if hasattr(model, "predict_proba"):
         p = model.predict_proba(X)
-        classes = list(getattr(model, "classes_", []))
-        if 1 in classes:
-            probs = p[:, classes.index(1)].tolist()
+        if pos_idx >= 0:
+            probs = p[:, pos_idx].tolist()
         else:
             probs = p.max(axis=1).tolist()
     return [int(v) for v in y_pred], probs
@@ -51,16 +55,13 @@ def run(input_csv: Path, output_csv: Path, rebuild: bool = False) -> Path:
     if not input_csv.exists():
         raise FileNotFoundError(f"Merged dataset not found: {input_csv}. Run preprocess.py first or pass --rebuild.")
 
-    df = pd.read_csv(input_csv)
+    df = pd.read_csv(input_csv, engine=CSV_ENGINE)
     df = ensure_severity_numeric(df)
 
-    # Heuristic scores
-    heur_scores: List[float] = []
-    heur_labels: List[int] = []
-    for _, r in df.iterrows():
-        s = fraud_score(r)
-        heur_scores.append(s)
-        heur_labels.append(fraud_label_from_score(s))
+    # Heuristic scores, all rows at once
+    scores = fraud_score_vec(df)
+    heur_scores = scores.astype(np.float32)
+    heur_labels = (scores > 0.5).astype(np.int8)
 
     # ML predictions (optional)
     model = load_model()
@@ -72,8 +73,16 @@ def run(input_csv: Path, output_csv: Path, rebuild: bool = False) -> Path:
             'location_match','vehicle_match','fraud_inconsistency_score',
             'severity_numeric','complexity_score'
         ]
-        X = df[feat_cols].fillna(0).astype(float)
-        ml_labels, ml_probs = predict_ml(model, X)
+        # Contiguous float32 matrix: what the tree estimators use internally, so no re-pack
+        X = np.ascontiguousarray(df[feat_cols].to_numpy(dtype=np.float32, na_value=np.nan))
+        np.nan_to_num(X, copy=False, nan=0.0, posinf=np.inf, neginf=-np.inf)
+        n_expected = getattr(model, "n_features_in_", X.shape[1])
+        if X.shape[1] != n_expected:
+            raise ValueError(
+                f"{MODELS / 'fraud_model.pkl'} expects {n_expected} features but batch_detect builds "
+                f"{X.shape[1]} ({', '.join(feat_cols)}); retrain it on these columns or update feat_cols."
+            )
+        ml_labels, ml_probs = predict_ml(model, X, positive_class_index(model))
 
     # Compose output
     out = pd.DataFrame({
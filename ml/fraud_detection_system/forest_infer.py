@@ -0,0 +1,142 @@
+from __future__ import annotations
+from typing import Tuple
+
+import numpy as np
+from sklearn.ensemble import ExtraTreesClassifier, ExtraTreesRegressor, RandomForestClassifier, RandomForestRegressor
+from sklearn.utils.metaestimators import available_if
+
+_FORESTS = (RandomForestClassifier, RandomForestRegressor, ExtraTreesClassifier, ExtraTreesRegressor)
+# Past this many rows sklearn's Cython predict wins (its fixed dispatch cost is amortised)
+SKLEARN_ROWS = 256
+
+
+def _pack(tree, is_classifier: bool) -> Tuple[np.ndarray, ...]:
+    """Node arrays for one fitted tree; leaves point at themselves so a walk can run a fixed depth."""
+    t = tree.tree_
+    nodes = np.arange(t.node_count)
+    leaf = t.children_left < 0
+    feature = np.where(leaf, 0, t.feature).astype(np.intp)
+    threshold = np.where(leaf, np.nan, t.threshold)
+    left = np.where(leaf, nodes, t.children_left).astype(np.intp)
+    right = np.where(leaf, nodes, t.children_right).astype(np.intp)
+    missing_left = t.missing_go_to_left.astype(bool)
+    if is_classifier:
+        # Same normalisation as DecisionTreeClassifier.predict_proba
+        value = t.value[:, 0, :].copy()
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        value /= normalizer
+    else:
+        value = t.value[:, 0, 0].copy()
+    return feature, threshold, left, right, missing_left, value, t.max_depth
+
+
+class CompiledForest:
+    """Serving-time stand-in for a fitted random forest: a branchless NumPy walk of every tree.
+
+    Each step moves every row one level down with ``np.where`` instead of per-row branching,
+    and skips sklearn's joblib dispatch, which dominates single-claim latency. Large batches
+    are handed back to the fitted model.
+
+    Thresholds are quantized: per feature, the sorted distinct split values become bin edges,
+    every threshold is stored as its uint8 (wider past 255 edges) edge index, and inputs are
+    binned once per call. ``x <= edges[k]`` holds exactly when ``bin(x) <= k``, so the walk
+    compares small integers with no float math and predictions stay identical.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.is_classifier = hasattr(model, "classes_")
+        if self.is_classifier:
+            self.classes_ = model.classes_
+        self.n_features_in_ = model.n_features_in_
+        trees = [_pack(est, self.is_classifier) for est in model.estimators_]
+
+        self.edges = []
+        for f in range(self.n_features_in_):
+            used = [threshold[feature == f] for feature, threshold, *_ in trees]
+            edges = np.unique(np.concatenate(used))
+            self.edges.append(edges[~np.isnan(edges)])
+        # Bins run 0..len(edges), so uint8 covers up to 255 edges per feature
+        widest = max(len(e) for e in self.edges)
+        self.bin_dtype = next(t for t in (np.uint8, np.uint16, np.uint32) if widest <= np.iinfo(t).max)
+        # Flatten every tree into one set of node arrays (structure of arrays); children are
+        # shifted by each tree's offset so they index the global arrays directly.
+        sizes = [len(t[0]) for t in trees]
+        self.roots = np.cumsum([0] + sizes[:-1]).astype(np.intp)
+        self.feature = np.concatenate([t[0] for t in trees])
+        threshold = np.concatenate([t[1] for t in trees])
+        self.left = np.concatenate([t[2] + off for t, off in zip(trees, self.roots)])
+        self.right = np.concatenate([t[3] + off for t, off in zip(trees, self.roots)])
+        self.missing_left = np.concatenate([t[4] for t in trees])
+        self.value = np.concatenate([t[5] for t in trees])
+        self.depth = max(t[6] for t in trees)
+
+        self.threshold = np.full(len(threshold), np.iinfo(self.bin_dtype).max, dtype=self.bin_dtype)
+        split = ~np.isnan(threshold)
+        for f in np.unique(self.feature[split]):
+            at = split & (self.feature == f)
+            self.threshold[at] = np.searchsorted(self.edges[f], threshold[at])
+
+    def _bin(self, X: np.ndarray) -> np.ndarray:
+        # sklearn compares float32 inputs against float64 thresholds; bin the same values
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        Xb = np.empty(X.shape, dtype=self.bin_dtype)
+        for f, edges in enumerate(self.edges):
+            Xb[:, f] = np.searchsorted(edges, X[:, f], side="left")
+        return Xb
+
+    def _check(self, X) -> np.ndarray:
+        # The shape errors sklearn's validation would raise, instead of an IndexError mid-walk
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2:
+            raise ValueError(
+                f"Expected 2D array, got {X.ndim}D array instead:\narray={X}.\n"
+                "Reshape your data either using array.reshape(-1, 1) if your data has a single feature "
+                "or array.reshape(1, -1) if it contains a single sample."
+            )
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has {X.shape[1]} features, but {type(self.model).__name__} is expecting "
+                f"{self.n_features_in_} features as input."
+            )
+        return X
+
+    def _accumulate(self, X: np.ndarray) -> np.ndarray:
+        X = self._check(X)
+        nan = np.isnan(X)
+        has_nan = nan.any()
+        Xb = self._bin(X)
+        rows = np.arange(Xb.shape[0])
+        # One column of node ids per row, one row per tree: every tree advances a level together
+        node = np.repeat(self.roots[:, np.newaxis], Xb.shape[0], axis=1)
+        for _ in range(self.depth):
+            f = self.feature[node]
+            go_left = Xb[rows, f] <= self.threshold[node]
+            if has_nan:
+                # Missing values follow the split's learned direction, as in sklearn
+                go_left = np.where(nan[rows, f], self.missing_left[node], go_left)
+            node = np.where(go_left, self.left[node], self.right[node])
+        # Summing over the leading (tree) axis adds trees in order, exactly as sklearn accumulates
+        return self.value[node].sum(axis=0) / len(self.roots)
+
+    # Only classifiers expose predict_proba, so hasattr() checks still tell the two apart
+    @available_if(lambda self: self.is_classifier)
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        if len(X) > SKLEARN_ROWS:
+            return self.model.predict_proba(X)
+        return self._accumulate(X)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        if len(X) > SKLEARN_ROWS:
+            return self.model.predict(X)
+        if self.is_classifier:
+            return self.classes_.take(np.argmax(self._accumulate(X), axis=1), axis=0)
+        return self._accumulate(X)
+
+
+def compile_forest(model):
+    """Return a ``CompiledForest`` for single-output sklearn forests; any other model is returned as-is."""
+    if isinstance(model, _FORESTS) and model.n_outputs_ == 1:
+        return CompiledForest(model)
+    return model
@@ -1,6 +1,41 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, Optional
+import importlib.util
+
+import numpy as np
+import pandas as pd
+
+# Weight and missing-value default per feature, shared by the scalar and vectorized scores
+FRAUD_WEIGHTS = {
+    "damage_difference": 0.18,
+    "injury_mismatch": 0.12,
+    "date_difference_days": 0.15,
+    "location_match": 0.09,
+    "vehicle_match": 0.09,
+    "rc_match": 0.10,
+    "dl_match": 0.10,
+    "patient_match": 0.08,
+    "hospital_match": 0.08,
+    "fraud_inconsistency_score": 0.01,
+}
+FRAUD_DEFAULTS = {k: 0.0 for k in FRAUD_WEIGHTS}
+FRAUD_DEFAULTS.update(patient_match=1.0, hospital_match=1.0)
+
+# Batched scoring works on an (n, 10) matrix in FRAUD_WEIGHTS column order; each column's
+# term is the value itself (0), one minus it for *_match (1), or capped days/10 (2).
+_SCORE_KEYS = tuple(FRAUD_WEIGHTS)
+_SCORE_W = np.array([FRAUD_WEIGHTS[k] for k in _SCORE_KEYS])
+_SCORE_KIND = np.array([2 if k == "date_difference_days" else 1 if k.endswith("_match") else 0 for k in _SCORE_KEYS], dtype=np.int8)
+
+
+def round_score(x):
+    """Round a score (or an array of scores) to 3 decimals.
+
+    Scalar and batched scoring both go through this one function: Python's ``round`` and
+    ``np.round`` disagree on some binary halfway cases, which could flip a label at 0.5.
+    """
+    return np.round(x, 3)
 
 
 def fraud_score(row: Dict) -> float:
@@ -18,18 +53,7 @@ def fraud_score(row: Dict) -> float:
     - hospital_match (0..1) 1=match
     - fraud_inconsistency_score (0..1)
     """
-    weights = {
-        "damage_difference": 0.18,
-        "injury_mismatch": 0.12,
-        "date_difference_days": 0.15,
-        "location_match": 0.09,
-        "vehicle_match": 0.09,
-        "rc_match": 0.10,
-        "dl_match": 0.10,
-        "patient_match": 0.08,
-        "hospital_match": 0.08,
-        "fraud_inconsistency_score": 0.01,
-    }
+    weights = FRAUD_WEIGHTS
     total = (
         weights["damage_difference"] * float(row.get("damage_difference", 0.0))
         + weights["injury_mismatch"] * float(row.get("injury_mismatch", 0.0))
@@ -42,7 +66,42 @@ def fraud_score(row: Dict) -> float:
         + weights["hospital_match"] * (1.0 - float(row.get("hospital_match", 1.0)))
         + weights["fraud_inconsistency_score"] * float(row.get("fraud_inconsistency_score", 0.0))
     )
-    return round(min(total, 1.0), 3)
+    return float(round_score(min(total, 1.0)))
+
+
+def _score_kernel(M: np.ndarray, w: np.ndarray, kind: np.ndarray) -> np.ndarray:
+    # Terms are added in the same order as fraud_score, so batched and scalar scores agree exactly
+    total = np.zeros(M.shape[0])
+    for j in range(M.shape[1]):
+        x = M[:, j]
+        if kind[j] == 1:
+            x = 1.0 - x
+        elif kind[j] == 2:
+            x = np.minimum(np.abs(x) / 10.0, 1.0)
+        total += w[j] * x
+    return np.minimum(total, 1.0)
+
+
+# Optional: compile the kernel when numba is installed (plain NumPy otherwise)
+if importlib.util.find_spec("numba") is not None:
+    import numba
+    _score_kernel = numba.njit(cache=True)(_score_kernel)
+
+
+def fraud_score_batch(cols: Dict[str, np.ndarray], n: Optional[int] = None) -> np.ndarray:
+    """``fraud_score`` for a batch given as one array per feature (missing features take their defaults)."""
+    if n is None:
+        n = len(next(iter(cols.values()))) if cols else 0
+    M = np.empty((n, len(_SCORE_KEYS)))
+    for j, k in enumerate(_SCORE_KEYS):
+        M[:, j] = cols[k] if k in cols else FRAUD_DEFAULTS[k]
+    return round_score(_score_kernel(M, _SCORE_W, _SCORE_KIND))
+
+
+def fraud_score_vec(df: pd.DataFrame) -> np.ndarray:
+    """Vectorized ``fraud_score`` over every row of ``df`` (same weights, defaults and rounding)."""
+    cols = {k: df[k].to_numpy(dtype=np.float64) for k in _SCORE_KEYS if k in df.columns}
+    return fraud_score_batch(cols, len(df))
 
 
 def fraud_label_from_score(score: float) -> int:
@@ -54,3 +113,9 @@ def severity_to_numeric(level: str | None) -> int:
     if not level:
         return 0
     return mapping.get(str(level).strip().lower(), 0)
+
+
+def positive_class_index(model) -> int:
+    """Column of class 1 in ``model.predict_proba`` output, or -1 if absent."""
+    classes = list(getattr(model, "classes_", []))
+    return classes.index(1) if 1 in classes else -1
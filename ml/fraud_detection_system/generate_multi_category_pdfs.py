@@ -1,11 +1,15 @@
 from __future__ import annotations
 import argparse
-import random
-from datetime import datetime, timedelta
+import shutil
+from collections import Counter
+from contextlib import ExitStack
+from zipfile import ZipFile
 from pathlib import Path
-from typing import Tuple, Dict, List
+from typing import Tuple, Dict, List, Optional
 
-import fitz  # PyMuPDF
+import numpy as np
+
+from pdf_writer import ENGINES, executor_for, render_pdf, write_pdf
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 DATASET = REPO_ROOT / "dataset"
@@ -40,94 +44,201 @@ def ensure_dirs():
             (DATASET / cat / SUBFOLDERS['hospital']).mkdir(parents=True, exist_ok=True)
 
 
-def _write_pdf(path: Path, lines: List[str]) -> None:
-    doc = fitz.open()
-    page = doc.new_page()
-    page.draw_line((40, 60), (page.rect.width - 40, 60), color=(0.2, 0.2, 0.2), width=1)
-    y = 80
-    for line in lines:
-        page.insert_text((50, y), line, fontsize=11)
-        y += 16
-        if y > page.rect.height - 50:
-            page = doc.new_page()
-            page.draw_line((40, 60), (page.rect.width - 40, 60), color=(0.2, 0.2, 0.2), width=1)
-            y = 80
-    doc.save(str(path))
-    doc.close()
-
-
 def _ids(cat: str, i: int) -> Tuple[str, str, str]:
-    short = f"CLM-2025-{i:04d}-{cat[:3].upper()}"
-    long_acord = f"CLM-2025-01-{i:04d}-{cat[:3].upper()}"
-    pr = f"PR-{10000 + i}-{cat[:3].upper()}"
+    code = cat[:3].upper()
+    short = f"CLM-2025-{i:04d}-{code}"
+    long_acord = f"CLM-2025-01-{i:04d}-{code}"
+    pr = f"PR-{10000 + i}-{code}"
     return short, long_acord, pr
 
 
-def _category_defaults(cat: str) -> Dict:
-    """Return category defaults while preserving schema but adding variability pools."""
-    cities = {
-        "accident": ["Mumbai", "Pune", "Delhi", "Bengaluru", "Chennai"],
-        "health": ["Pune", "Nashik", "Nagpur", "Indore", "Bhopal"],
-    }
-    incident_types = {
-        "accident": ["Rear collision", "Side swipe", "Head-on", "Parking damage"],
-        "health": ["Hospitalization", "Surgery", "Outpatient care"],
-    }
-    base_cost_ranges = {
-        "accident": (80000, 300000),
-        "health": (50000, 250000),
+CATEGORY_CITIES = {
+    "accident": ("Mumbai", "Pune", "Delhi", "Bengaluru", "Chennai"),
+    "health": ("Pune", "Nashik", "Nagpur", "Indore", "Bhopal"),
+}
+CATEGORY_INCIDENT_TYPES = {
+    "accident": ("Rear collision", "Side swipe", "Head-on", "Parking damage"),
+    "health": ("Hospitalization", "Surgery", "Outpatient care"),
+}
+CATEGORY_COST_RANGES = {
+    "accident": (80000, 300000),
+    "health": (50000, 250000),
+}
+# Cities a risky claim's police/loss documents may drift to, keyed by the claim's own city
+CITY_POOL = ("Pune", "Delhi", "Mumbai", "Bengaluru", "Chennai", "Hyderabad", "Kolkata")
+OTHER_CITIES = {
+    c: tuple(x for x in CITY_POOL if x != c)
+    for cities in CATEGORY_CITIES.values() for c in cities
+}
+
+
+STATES = ("MH", "DL", "KA", "TN", "GJ", "RJ", "UP", "PB")
+RC_OWNERS = ("A. Sharma", "V. Nair", "R. Singh", "P. Iyer", "S. Khan", "D. Patel")
+VEHICLE_MODELS = ("Maruti Swift", "Hyundai i20", "Honda City", "Tata Nexon", "Kia Seltos")
+FUEL_TYPES = ("Petrol", "Diesel", "CNG")
+COLORS = ("White", "Black", "Silver", "Blue")
+DL_HOLDERS = ("Rahul Mehta", "Priya Sharma", "Arjun Verma", "Neha Gupta", "Kiran Rao", "Deepak Joshi")
+STREETS = ("MG Road", "FC Road", "Ring Road", "Park Street")
+ADDRESS_CITIES = ("Mumbai", "Pune", "Delhi", "Bengaluru")
+PRESCRIPTIONS = (
+    "Paracetamol 500mg, 2x daily",
+    "Ibuprofen 400mg, after meals",
+    "Amoxicillin 250mg, 3x daily",
+    "Vitamin D 1000 IU, daily",
+)
+
+# Everything that differs between SAFE and RISK claims; (low, high) pairs are numpy bounds (high exclusive)
+_MODE = {
+    True: {
+        "tag": "RISK",
+        "loss_days": (7, 31),
+        "police_days": (3, 16),
+        "insp_days": (5, 21),
+        "cost_l_mult": (0.35, 0.6),
+        "police_cost_mult": (1.15, 1.6),
+        "cross_city": True,
+        "injury_flip": True,
+        "status": "Under Review",
+    },
+    False: {
+        "tag": "SAFE",
+        "loss_days": (0, 3),
+        "police_days": (0, 3),
+        "insp_days": (2, 8),
+        "cost_l_mult": (0.95, 1.0),
+        "police_cost_mult": (0.95, 1.05),
+        "cross_city": False,
+        "injury_flip": False,
+        "status": "Approved",
+    },
+}
+
+
+def _draw_batch(rng: np.random.Generator, cat: str, n: int, risky: bool) -> List[Dict]:
+    """Draw every random value for ``n`` claims up front; one dict of scalars per claim."""
+    low, high = CATEGORY_COST_RANGES.get(cat, (90000, 300000))
+    mode = _MODE[risky]
+    loss_days, police_days, insp_days = (rng.integers(*mode[k], n) for k in ("loss_days", "police_days", "insp_days"))
+    cost_l_mult = rng.uniform(*mode["cost_l_mult"], n)
+    police_cost_mult = rng.uniform(*mode["police_cost_mult"], n)
+    loc = rng.choice(CATEGORY_CITIES.get(cat, ("Chennai",)), n)
+    # Police/loss cities: two distinct "other" cities when the mode crosses cities, else the claim's own.
+    # The draw happens either way so SAFE and RISK batches consume the stream identically.
+    other_u = rng.random((n, 2))
+    loc_pl = []
+    for c, (u1, u2) in zip(loc.tolist(), other_u.tolist()):
+        pool = OTHER_CITIES.get(c, CITY_POOL)
+        a = int(u1 * len(pool))
+        b = int(u2 * (len(pool) - 1))
+        loc_pl.append((pool[a], pool[b + (b >= a)]) if mode["cross_city"] else (c, c))
+    draws = {
+        "loc": loc,
+        "type": rng.choice(CATEGORY_INCIDENT_TYPES.get(cat, ("Incident",)), n),
+        "base_cost": rng.integers(low, high + 1, n),
+        "month": rng.integers(1, 11, n),
+        "day": rng.integers(1, 29, n),
+        "loss_days": loss_days,
+        "police_days": police_days,
+        "insp_days": insp_days,
+        "ins_start_days": rng.integers(90, 366, n),
+        "ins_len_days": rng.integers(180, 731, n),
+        "ins_ext_days": rng.integers(30, 181, n),
+        "jitter": rng.uniform(0.9, 1.1, n),
+        "cost_l_mult": cost_l_mult,
+        "police_cost_mult": police_cost_mult,
+        "inj_flip": (rng.random(n) < 0.6) & mode["injury_flip"],
+        "state": rng.choice(STATES, n),
+        "rc_num": rng.integers(100000, 1000000, n),
+        "dl_num": rng.integers(100000, 1000000, n),
+        "patient_num": rng.integers(100000, 1000000, n),
+        "hospital_num": rng.integers(1000, 10000, n),
+        "owner": rng.choice(RC_OWNERS, n),
+        "vehicle_model": rng.choice(VEHICLE_MODELS, n),
+        "plate_num": rng.integers(1000, 10000, n),
+        "year": rng.integers(2015, 2025, n),
+        "fuel": rng.choice(FUEL_TYPES, n),
+        "color": rng.choice(COLORS, n),
+        "dl_holder": rng.choice(DL_HOLDERS, n),
+        "dob_days": rng.integers(0, 15001, n),
+        "valid_from_days": rng.integers(0, 366, n),
+        "valid_len_days": rng.integers(3 * 365, 8 * 365 + 1, n),
+        "street": rng.choice(STREETS, n),
+        "address_city": rng.choice(ADDRESS_CITIES, n),
+        "prescription": rng.choice(PRESCRIPTIONS, n),
+        "admit_days": rng.integers(0, 3, n),
+        "stay_days": rng.integers(1, 8, n),
+        "bill_mult": rng.uniform(0.4, 0.9, n),
     }
 
-    loc = random.choice(cities.get(cat, ["Chennai"]))
-    typ = random.choice(incident_types.get(cat, ["Incident"]))
-    low, high = base_cost_ranges.get(cat, (90000, 300000))
-    base_cost = random.randint(low, high)
+    # Numeric/date core of _make_lines, computed for the whole batch; workers only format strings
+    def days(key: str) -> np.ndarray:
+        return draws.pop(key).astype("timedelta64[D]")
+
+    inc = (np.datetime64("2025-01", "M") + (draws.pop("month") - 1)).astype("datetime64[D]") + days("day") - 1
+    ins_start = inc - days("ins_start_days")
+    ins_end = ins_start + days("ins_len_days")
+    ins_end = np.where(ins_end < inc, inc + days("ins_ext_days"), ins_end)
+    admit = inc + days("admit_days")
+    valid_from = np.datetime64("2018-01-01") + days("valid_from_days")
+    dates = {
+        "inc_date": inc,
+        "loss_date": inc + days("loss_days"),
+        "police_date": inc + days("police_days"),
+        "insp_date": inc + days("insp_days"),
+        "insurance_start": ins_start,
+        "insurance_expiry": ins_end,
+        "dob": np.datetime64("1980-01-01") + days("dob_days"),
+        "valid_from": valid_from,
+        "valid_to": valid_from + days("valid_len_days"),
+        "admit_date": admit,
+        "discharge_date": admit + days("stay_days"),
+    }
+    cols = {k: np.datetime_as_string(v, unit="D") for k, v in dates.items()}
+    # int() truncation of the same float64 products the scalar code computed
+    cost_a = (draws.pop("base_cost") * draws.pop("jitter")).astype(np.int64)
+    cost_l = (cost_a * draws.pop("cost_l_mult")).astype(np.int64)
+    cols.update(
+        cost_a=cost_a,
+        cost_l=cost_l,
+        cost_p=(cost_a * draws.pop("police_cost_mult")).astype(np.int64),
+        cost_approved=(cost_l * 0.9).astype(np.int64),
+        bill_amount=(cost_a * draws.pop("bill_mult")).astype(np.int64),
+    )
+    cols.update(draws)
+
+    keys = list(cols)
+    rows = [dict(zip(keys, vals)) for vals in zip(*(cols[k].tolist() for k in keys))]
+    for row, (loc_p, loc_l) in zip(rows, loc_pl):
+        row["loc_p"], row["loc_l"] = loc_p, loc_l
+    return rows
+
+
+def _category_defaults(cat: str, d: Dict) -> Dict:
+    """Return category defaults while preserving schema but adding variability pools."""
     reg = "MH 12 AB 4567" if cat == "accident" else None
     inj = (cat in {"accident", "health", "casualty"})
-    return {"loc": loc, "inj": inj, "base_cost": base_cost, "reg": reg, "type": typ}
+    return {"loc": d["loc"], "inj": inj, "reg": reg, "type": d["type"]}
 
 
-def _make_lines(cat: str, i: int, risky: bool) -> Tuple[List[str], List[str], List[str], List[str], List[str], List[str]]:
+def _make_lines(cat: str, i: int, risky: bool, d: Dict) -> Tuple[Tuple[str, str, str], List[str], List[str], List[str], List[str], List[str], List[str]]:
     short, long_acord, pr = _ids(cat, i)
-    base = _category_defaults(cat)
-    # variable base date per sample
-    base_date = datetime(2025, random.randint(1, 10), random.randint(1, 28))
-    # incident/claim/inspection timing variability to influence date_difference_days
-    if risky:
-        inc_dt = base_date
-        loss_dt = base_date + timedelta(days=random.randint(7, 30))
-        police_dt = base_date + timedelta(days=random.randint(3, 15))
-        insp_dt = base_date + timedelta(days=random.randint(5, 20))
-    else:
-        inc_dt = base_date
-        loss_dt = base_date + timedelta(days=random.randint(0, 2))
-        police_dt = base_date + timedelta(days=random.randint(0, 2))
-        insp_dt = base_date + timedelta(days=random.randint(2, 7))
-    inc_date = inc_dt.strftime("%Y-%m-%d")
-    loss_date = loss_dt.strftime("%Y-%m-%d")
-
-    # insurance coverage window: start before incident, expiry after incident (by default)
-    ins_start_dt = inc_dt - timedelta(days=random.randint(90, 365))
-    ins_end_dt = ins_start_dt + timedelta(days=random.randint(180, 730))
-    if ins_end_dt < inc_dt:
-        ins_end_dt = inc_dt + timedelta(days=random.randint(30, 180))
-    insurance_start = ins_start_dt.strftime("%Y-%m-%d")
-    insurance_expiry = ins_end_dt.strftime("%Y-%m-%d")
+    base = _category_defaults(cat, d)
+    # dates and costs come precomputed from _draw_batch (timing/cost spread depends on risky)
+    inc_date = d["inc_date"]
+    loss_date = d["loss_date"]
+    insurance_start = d["insurance_start"]
+    insurance_expiry = d["insurance_expiry"]
 
     loc_a = base["loc"]
-    # occasional intra-city variation; risky cases may cross cities
-    city_pool = [base["loc"], "Pune", "Delhi", "Mumbai", "Bengaluru", "Chennai", "Hyderabad", "Kolkata"]
-    loc_p = (base["loc"] if not risky else random.choice([c for c in city_pool if c != base["loc"]]))
-    loc_l = (base["loc"] if not risky else random.choice([c for c in city_pool if c != base["loc"]]))
+    # risky cases may cross cities (resolved in _draw_batch)
+    loc_p, loc_l = d["loc_p"], d["loc_l"]
 
-    # widen cost variability and create disagreement in risky samples
-    jitter = random.uniform(0.9, 1.1)
-    cost_a = int(base["base_cost"] * jitter)
-    cost_l = int(cost_a * (random.uniform(0.35, 0.6) if risky else random.uniform(0.95, 1.0)))
+    cost_a = d["cost_a"]
+    cost_l = d["cost_l"]
 
     # injuries may mismatch under risk
     inj_a = "True" if base["inj"] else "False"
-    if risky and base["inj"] and random.random() < 0.6:
+    if base["inj"] and d["inj_flip"]:
         inj_p = "False"
         inj_l = "False"
     else:
@@ -136,11 +247,11 @@ def _make_lines(cat: str, i: int, risky: bool) -> Tuple[List[str], List[str], Li
 
     reg = base["reg"]
     # Accident uses RC/DL; Health uses patient/hospital identifiers
-    state = random.choice(["MH","DL","KA","TN","GJ","RJ","UP","PB"])
-    rc_no = f"RC-{state}-{random.randint(100000, 999999)}"
-    dl_no = f"DL-{state}-2025-{random.randint(100000, 999999)}"
-    patient_id = f"PID-{random.randint(100000,999999)}"
-    hospital_code = f"HOSP-{random.randint(1000,9999)}"
+    state = d["state"]
+    rc_no = f"RC-{state}-{d['rc_num']}"
+    dl_no = f"DL-{state}-2025-{d['dl_num']}"
+    patient_id = f"PID-{d['patient_num']}"
+    hospital_code = f"HOSP-{d['hospital_num']}"
 
     # Accord (claim form)
     acord = [
@@ -185,11 +296,11 @@ def _make_lines(cat: str, i: int, risky: bool) -> Tuple[List[str], List[str], Li
         "----------------------",
         f"Police Report No: {pr}",
         f"Claim ID: {short}",
-        f"Report Date: {police_dt.strftime('%Y-%m-%d')}",
+        f"Report Date: {d['police_date']}",
         f"Incident Date: {inc_date}",
         f"Location: {loc_p}",
         f"Injuries Reported: {inj_p}",
-        f"Estimated Damage Cost: ₹{int(cost_a * (random.uniform(1.15, 1.6) if risky else random.uniform(0.95, 1.05)))}",
+        f"Estimated Damage Cost: ₹{d['cost_p']}",
     ]
     if cat == 'accident':
         police.insert(7, f"RC No: {rc_no}")
@@ -202,14 +313,14 @@ def _make_lines(cat: str, i: int, risky: bool) -> Tuple[List[str], List[str], Li
         f"{cat.capitalize()} Loss/Assessment Report",
         "---------------------",
         f"Claim ID: {short}",
-        f"Inspection Date: {insp_dt.strftime('%Y-%m-%d')}",
+        f"Inspection Date: {d['insp_date']}",
         f"Loss Date: {loss_date}",
         f"Inspection Location: {loc_l} Center",
         f"Injuries Reported: {inj_l}",
         f"Estimated Damage Cost: ₹{cost_l}",
-        f"Approved Repair Amount: ₹{int(cost_l*0.9)}",
+        f"Approved Repair Amount: ₹{d['cost_approved']}",
         "Total Loss: False",
-        f"Claim Status: {'Under Review' if risky else 'Approved'}",
+        f"Claim Status: {_MODE[risky]['status']}",
     ]
     if cat == 'accident':
         loss.insert(6, f"RC No: {rc_no}")
@@ -223,50 +334,40 @@ def _make_lines(cat: str, i: int, risky: bool) -> Tuple[List[str], List[str], Li
         loss += ["Medical Notes: Recovery ongoing"]
 
     # RC Document (Registration Certificate) - accident only
-    owner = random.choice(["A. Sharma","V. Nair","R. Singh","P. Iyer","S. Khan","D. Patel"])
-    vehicle_model = random.choice(["Maruti Swift","Hyundai i20","Honda City","Tata Nexon","Kia Seltos"])
+    owner = d["owner"]
+    vehicle_model = d["vehicle_model"]
     rc_lines = [
         "Vehicle Registration Certificate",
         "-------------------------------",
         f"Claim ID: {short}",
         f"RC No: {rc_no}",
-        f"Registration: {reg if reg else state + ' 01 XX ' + str(random.randint(1000,9999))}",
+        f"Registration: {reg if reg else state + ' 01 XX ' + str(d['plate_num'])}",
         f"Owner: {owner}",
         f"Vehicle Model: {vehicle_model}",
-        f"Manufacture Year: {random.randint(2015, 2024)}",
-        f"Fuel Type: {random.choice(['Petrol','Diesel','CNG'])}",
-        f"Color: {random.choice(['White','Black','Silver','Blue'])}",
+        f"Manufacture Year: {d['year']}",
+        f"Fuel Type: {d['fuel']}",
+        f"Color: {d['color']}",
         "Notes: Verified by RTO.",
     ]
 
     # DL Document (Driver License) - accident only
-    dl_holder = random.choice(["Rahul Mehta","Priya Sharma","Arjun Verma","Neha Gupta","Kiran Rao","Deepak Joshi"])
-    dob = datetime(1980, 1, 1) + timedelta(days=random.randint(0, 15000))
-    valid_from = datetime(2018, 1, 1) + timedelta(days=random.randint(0, 365))
-    valid_to = valid_from + timedelta(days=random.randint(3*365, 8*365))
+    dl_holder = d["dl_holder"]
     dl_lines = [
         "Driver License",
         "--------------",
         f"Claim ID: {short}",
         f"DL No: {dl_no}",
         f"Name: {dl_holder}",
-        f"DOB: {dob.strftime('%Y-%m-%d')}",
-        f"Address: {random.choice(['MG Road','FC Road','Ring Road','Park Street'])}, {random.choice(['Mumbai','Pune','Delhi','Bengaluru'])}",
-        f"Valid From: {valid_from.strftime('%Y-%m-%d')}",
-        f"Valid To: {valid_to.strftime('%Y-%m-%d')}",
+        f"DOB: {d['dob']}",
+        f"Address: {d['street']}, {d['address_city']}",
+        f"Valid From: {d['valid_from']}",
+        f"Valid To: {d['valid_to']}",
         f"Issuing Authority: {state} RTO",
         "Remarks: Clean record.",
     ]
 
     # Hospital Bill - health only
-    prescription = random.choice([
-        "Paracetamol 500mg, 2x daily",
-        "Ibuprofen 400mg, after meals",
-        "Amoxicillin 250mg, 3x daily",
-        "Vitamin D 1000 IU, daily",
-    ])
-    admit_dt = inc_dt + timedelta(days=random.randint(0, 2))
-    discharge_dt = admit_dt + timedelta(days=random.randint(1, 7))
+    prescription = d["prescription"]
     hospital_lines = [
         "Hospital Bill",
         "-------------",
@@ -274,12 +375,38 @@ def _make_lines(cat: str, i: int, risky: bool) -> Tuple[List[str], List[str], Li
         f"Patient ID: {patient_id}",
         f"Hospital Code: {hospital_code}",
         f"Prescription: {prescription}",
-        f"Admission Date: {admit_dt.strftime('%Y-%m-%d')}",
-        f"Discharge Date: {discharge_dt.strftime('%Y-%m-%d')}",
-        f"Bill Amount: ₹{int(cost_a * random.uniform(0.4, 0.9))}",
+        f"Admission Date: {d['admit_date']}",
+        f"Discharge Date: {d['discharge_date']}",
+        f"Bill Amount: ₹{d['bill_amount']}",
     ]
 
-    return acord, police, loss, rc_lines, dl_lines, hospital_lines
+    # ids go back to the caller so it does not rebuild them for the filenames
+    return (short, long_acord, pr), acord, police, loss, rc_lines, dl_lines, hospital_lines
+
+
+def _emit_claim(cat: str, i: int, risky: bool, draws: Dict, engine: str, bundle: bool = False) -> List[Tuple[str, str, Optional[bytes]]]:
+    """Write (or, in bundle mode, render) one claim's PDFs; returns (kind, archive name, bytes or None) per PDF."""
+    (short, long_acord, pr), acord, police, loss, rc_lines, dl_lines, hospital_lines = _make_lines(cat, i, risky, draws)
+    tag = _MODE[risky]["tag"]
+    docs = [('accord', f"{short}_{tag}_acord.pdf", acord)]
+    if cat == 'accident':
+        docs.append(('police', f"{pr}_{short}_{tag}_police.pdf", police))
+    docs.append(('loss', f"{short}_{tag}_loss.pdf", loss))
+    if cat == 'accident':
+        docs.append(('rc', f"{short}_{tag}_rc.pdf", rc_lines))
+        docs.append(('dl', f"{short}_{tag}_dl.pdf", dl_lines))
+    if cat == 'health':
+        docs.append(('hospital', f"{short}_{tag}_hospital.pdf", hospital_lines))
+    out = []
+    for kind, fname, lines in docs:
+        name = f"{cat}/{SUBFOLDERS[kind]}/{fname}"
+        # Bundle mode hands the bytes back so the parent appends them to one archive
+        if bundle:
+            out.append((kind, name, render_pdf(lines, engine)))
+        else:
+            write_pdf(DATASET / name, lines, engine)
+            out.append((kind, name, None))
+    return out
 
 
 def main():
@@ -288,60 +415,48 @@ def main():
     ap.add_argument("--risk", type=int, default=20)
     ap.add_argument("--seed", type=int, default=42)
     ap.add_argument("--clean", action="store_true")
+    ap.add_argument("--engine", choices=ENGINES, default="raw", help="PDF writer: direct bytes (raw) or PyMuPDF (fitz)")
+    ap.add_argument("--bundle", type=Path, help="Write all PDFs into this zip archive instead of the dataset folders")
     args = ap.parse_args()
 
-    random.seed(args.seed)
-    ensure_dirs()
-
-    # optional clean
-    if args.clean:
+    # optional clean: drop whole output folders; ensure_dirs recreates the ones each category uses.
+    # Bundle mode writes only the zip, so it never touches (or creates) the dataset folders.
+    if not args.bundle:
+        if args.clean:
+            for cat in CATEGORIES:
+                for sub in SUBFOLDERS.values():
+                    shutil.rmtree(DATASET / cat / sub, ignore_errors=True)
+        ensure_dirs()
+
+    # All randomness is drawn up front in the parent, so workers only format and write
+    rng = np.random.default_rng(args.seed)
+    total = args.safe + args.risk
+    risky_flags = [i > args.safe for i in range(1, total + 1)]
+    counts = Counter()
+    with ExitStack() as stack:
+        # The zip is closed (central directory written) even if generation fails part way
+        bundle = stack.enter_context(ZipFile(args.bundle, "w")) if args.bundle else None
+        ex = stack.enter_context(executor_for(args.engine))
         for cat in CATEGORIES:
-            for sub in SUBFOLDERS.values():
-                for p in (DATASET / cat / sub).glob("*.pdf"):
-                    try:
-                        p.unlink()
-                    except Exception:
-                        pass
-
-    for cat in CATEGORIES:
-        for i in range(1, args.safe + 1):
-            acord, police, loss, rc_lines, dl_lines, hospital_lines = _make_lines(cat, i, risky=False)
-            short, long_acord, pr = _ids(cat, i)
-            (DATASET / cat / SUBFOLDERS['accord'] / f"{short}_SAFE_acord.pdf").write_text("")
-            _write_pdf(DATASET / cat / SUBFOLDERS['accord'] / f"{short}_SAFE_acord.pdf", acord)
-            if cat == 'accident':
-                _write_pdf(DATASET / cat / SUBFOLDERS['police'] / f"{pr}_{short}_SAFE_police.pdf", police)
-            _write_pdf(DATASET / cat / SUBFOLDERS['loss'] / f"{short}_SAFE_loss.pdf", loss)
-            if cat == 'accident':
-                _write_pdf(DATASET / cat / SUBFOLDERS['rc'] / f"{short}_SAFE_rc.pdf", rc_lines)
-                _write_pdf(DATASET / cat / SUBFOLDERS['dl'] / f"{short}_SAFE_dl.pdf", dl_lines)
-            if cat == 'health':
-                _write_pdf(DATASET / cat / SUBFOLDERS['hospital'] / f"{short}_SAFE_hospital.pdf", hospital_lines)
-        for i in range(args.safe + 1, args.safe + args.risk + 1):
-            acord, police, loss, rc_lines, dl_lines, hospital_lines = _make_lines(cat, i, risky=True)
-            short, long_acord, pr = _ids(cat, i)
-            _write_pdf(DATASET / cat / SUBFOLDERS['accord'] / f"{short}_RISK_acord.pdf", acord)
-            if cat == 'accident':
-                _write_pdf(DATASET / cat / SUBFOLDERS['police'] / f"{pr}_{short}_RISK_police.pdf", police)
-            _write_pdf(DATASET / cat / SUBFOLDERS['loss'] / f"{short}_RISK_loss.pdf", loss)
-            if cat == 'accident':
-                _write_pdf(DATASET / cat / SUBFOLDERS['rc'] / f"{short}_RISK_rc.pdf", rc_lines)
-                _write_pdf(DATASET / cat / SUBFOLDERS['dl'] / f"{short}_RISK_dl.pdf", dl_lines)
-            if cat == 'health':
-                _write_pdf(DATASET / cat / SUBFOLDERS['hospital'] / f"{short}_RISK_hospital.pdf", hospital_lines)
-
+            draws = _draw_batch(rng, cat, args.safe, False) + _draw_batch(rng, cat, args.risk, True)
+            results = ex.map(_emit_claim, [cat] * total, range(1, total + 1), risky_flags, draws,
+                             [args.engine] * total, [bundle is not None] * total, chunksize=8)
+            for docs in results:
+                for kind, name, data in docs:
+                    counts[cat, kind] += 1
+                    if data is not None:
+                        bundle.writestr(name, data)
+    if args.bundle:
+        print(f"Wrote {sum(counts.values())} PDFs to {args.bundle}")
+
+    # Tallied while generating; no need to re-list the folders
     print("Generated PDFs for categories:")
     for cat in CATEGORIES:
-        accord_n = sum(1 for _ in (DATASET/cat/SUBFOLDERS['accord']).glob('*.pdf'))
-        loss_n = sum(1 for _ in (DATASET/cat/SUBFOLDERS['loss']).glob('*.pdf'))
         if cat == 'accident':
-            police_n = sum(1 for _ in (DATASET/cat/SUBFOLDERS['police']).glob('*.pdf'))
-            rc_n = sum(1 for _ in (DATASET/cat/SUBFOLDERS['rc']).glob('*.pdf'))
-            dl_n = sum(1 for _ in (DATASET/cat/SUBFOLDERS['dl']).glob('*.pdf'))
-            print(f" - {cat} -> {accord_n} accord, {police_n} police, {loss_n} loss, {rc_n} rc, {dl_n} dl")
+            print(f" - {cat} -> {counts[cat, 'accord']} accord, {counts[cat, 'police']} police, {counts[cat, 'loss']} loss, "
+                  f"{counts[cat, 'rc']} rc, {counts[cat, 'dl']} dl")
         else:
-            hosp_n = sum(1 for _ in (DATASET/cat/SUBFOLDERS['hospital']).glob('*.pdf'))
-            print(f" - {cat} -> {accord_n} accord, {loss_n} loss, {hosp_n} hospital bills")
+            print(f" - {cat} -> {counts[cat, 'accord']} accord, {counts[cat, 'loss']} loss, {counts[cat, 'hospital']} hospital bills")
 
 
 if __name__ == "__main__":
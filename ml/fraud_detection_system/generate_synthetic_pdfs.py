@@ -1,11 +1,14 @@
 from __future__ import annotations
-import random
 import argparse
+import shutil
+from zipfile import ZipFile
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Tuple
+from typing import Dict, List, Tuple
 
-import fitz  # PyMuPDF
+import numpy as np
+
+from pdf_writer import ENGINES, executor_for, render_pdf, write_pdf
 
 # Output folders (existing in repo root dataset)
 REPO_ROOT = Path(__file__).resolve().parents[1]
@@ -24,23 +27,6 @@ RC_DIR.mkdir(parents=True, exist_ok=True)
 DL_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def _write_pdf(path: Path, text: str) -> None:
-    doc = fitz.open()
-    page = doc.new_page()
-    # Simple header line
-    page.draw_line((40, 60), (page.rect.width - 40, 60), color=(0.2, 0.2, 0.2), width=1)
-    y = 80
-    for line in text.splitlines():
-        page.insert_text((50, y), line, fontsize=11)
-        y += 16
-        if y > page.rect.height - 50:
-            page = doc.new_page()
-            page.draw_line((40, 60), (page.rect.width - 40, 60), color=(0.2, 0.2, 0.2), width=1)
-            y = 80
-    doc.save(str(path))
-    doc.close()
-
-
 def _make_identifiers(i: int) -> Tuple[str, str, str]:
     short = f"CLM-2025-{i:04d}"
     long_acord = f"CLM-2025-01-{i:04d}"
@@ -48,12 +34,38 @@ def _make_identifiers(i: int) -> Tuple[str, str, str]:
     return short, long_acord, pr
 
 
-def _sample_location_pair(risky: bool) -> Tuple[str, str, str]:
-    cities = ["Delhi", "Mumbai", "Bengaluru", "Chennai", "Pune", "Hyderabad", "Kolkata"]
-    a = random.choice(cities)
+CITIES = ("Delhi", "Mumbai", "Bengaluru", "Chennai", "Pune", "Hyderabad", "Kolkata")
+STATES = ("MH", "DL", "KA", "TN", "GJ", "RJ", "UP", "PB")
+
+
+def _draw_batch(rng: np.random.Generator, n: int) -> List[Dict]:
+    """Draw every random value for ``n`` claims up front; one dict of scalars per claim."""
+    # Three distinct cities per claim: first three of a per-row permutation
+    locs = rng.permuted(np.tile(np.array(CITIES), (n, 1)), axis=1)[:, :3]
+    cols = {
+        "locs": locs,
+        "state": rng.choice(STATES, n),
+        "rc_num": rng.integers(100000, 1000000, n),
+        "dl_num": rng.integers(100000, 1000000, n),
+        "owner": rng.choice(["A. Sharma", "V. Nair", "R. Singh", "P. Iyer", "S. Khan", "D. Patel"], n),
+        "vehicle_model": rng.choice(["Maruti Swift", "Hyundai i20", "Honda City", "Tata Nexon", "Kia Seltos"], n),
+        "year": rng.integers(2015, 2025, n),
+        "fuel": rng.choice(["Petrol", "Diesel", "CNG"], n),
+        "color": rng.choice(["White", "Black", "Silver", "Blue"], n),
+        "dl_holder": rng.choice(["Rahul Mehta", "Priya Sharma", "Arjun Verma", "Neha Gupta", "Kiran Rao", "Deepak Joshi"], n),
+        "dob_days": rng.integers(0, 15001, n),
+        "street": rng.choice(["MG Road", "FC Road", "Ring Road", "Park Street"], n),
+        "address_city": rng.choice(["Mumbai", "Pune", "Delhi", "Bengaluru"], n),
+        "valid_from_days": rng.integers(0, 366, n),
+        "valid_to_days": rng.integers(365, 8 * 365 + 1, n),
+    }
+    keys = list(cols)
+    return [dict(zip(keys, vals)) for vals in zip(*(cols[k].tolist() for k in keys))]
+
+
+def _sample_location_pair(risky: bool, d: Dict) -> Tuple[str, str, str]:
+    a, b, c = d["locs"]
     if risky:
-        b = random.choice([c for c in cities if c != a])
-        c = random.choice([c for c in cities if c not in (a, b)])
         return a, b, c  # all different
     else:
         return a, a, a
@@ -66,54 +78,14 @@ def _reg_plate(i: int, variant: int = 0) -> str:
     return base.replace("AB", "CD", 1)
 
 
-def _make_docs(i: int, risky: bool) -> None:
-    short, long_acord, pr = _make_identifiers(i)
-    # RC/DL numbers
-    state = random.choice(["MH","DL","KA","TN","GJ","RJ","UP","PB"])
-    rc_no = f"RC-{state}-{random.randint(100000, 999999)}"
-    dl_no = f"DL-{state}-2025-{random.randint(100000, 999999)}"
-
-    # Dates
-    base_date = datetime(2025, 10, 5) + timedelta(days=i % 10)
-    if risky:
-        inc_date = base_date.strftime("%Y-%m-%d")
-        loss_date = (base_date + timedelta(days=14)).strftime("%Y-%m-%d")  # 14-day gap
-    else:
-        inc_date = base_date.strftime("%Y-%m-%d")
-        loss_date = base_date.strftime("%Y-%m-%d")
-
-    # Locations and registration
-    loc_acord, loc_police, loc_loss = _sample_location_pair(risky)
-    reg_acord = _reg_plate(i, 0)
-    reg_police = _reg_plate(i, 1) if risky else _reg_plate(i, 0)
-    reg_loss = _reg_plate(i, 1) if risky else _reg_plate(i, 0)
-
-    # Injuries
-    inj_acord = "True"
-    inj_police = "True"
-    inj_loss = "False" if risky else "True"
-
-    # Damage costs
-    base_cost = 120000 + (i % 7) * 3000
-    if risky:
-        loss_cost = int(base_cost * 0.4)  # large discrepancy
-        acord_cost = base_cost
-    else:
-        # within ~2%
-        loss_cost = base_cost - 1500
-        acord_cost = base_cost
-
-    # Total loss
-    total_loss = "False"
-
-    # Build ACORD content (include realistic-looking sections; keep parser-friendly labels)
-    acord_text = f"""
+# Document bodies, stripped once at import; _make_docs fills them with format_map
+ACORD_TMPL = """
 ACORD First Notice of Loss (FNOL)
 ---------------------------------
 Claim ID: {long_acord}
-Policy Number: POL-{400000 + i}
+Policy Number: POL-{policy_no}
 Claimant Name: Rajesh Mehta
-Claimant Contact: +91 98{10000 + i}
+Claimant Contact: +91 98{contact_no}
 Claimant Address: 14 MG Road, {loc_acord}
 
 Vehicle Details
@@ -127,7 +99,7 @@ Incident Date: {inc_date}
 Location: {loc_acord}
 DL No: {dl_no}
 Injuries Reported: {inj_acord}
-Photos Attached: {5 + (i % 3)}
+Photos Attached: {photos}
 
 Financials
 Estimated Damage Cost: ₹{acord_cost}
@@ -135,29 +107,27 @@ Police Report Filed: True
 Police Report No: {pr}
 """.strip()
 
-    # Build Police
-    police_text = f"""
+POLICE_TMPL = """
 Police Accident Report
 ----------------------
 Police Report No: {pr}
 Claim ID: {short}
-Report Date: {(datetime.fromisoformat(inc_date) + timedelta(days=1)).strftime('%Y-%m-%d')}
+Report Date: {report_date}
 Incident Date: {inc_date}
 Location: {loc_police}
 Registration: {reg_police}
 RC No: {rc_no}
 DL No: {dl_no}
 Injuries Reported: {inj_police}
-Estimated Damage Cost: ₹{acord_cost if not risky else int(acord_cost*1.3)}
+Estimated Damage Cost: ₹{police_cost}
 Officer Summary: Officer observed moderate rear-end damage.
 """.strip()
 
-    # Build Loss
-    loss_text = f"""
+LOSS_TMPL = """
 Loss Adjustment Report
 ---------------------
 Claim ID: {short}
-Inspection Date: {(datetime.fromisoformat(inc_date) + timedelta(days=7)).strftime('%Y-%m-%d')}
+Inspection Date: {insp_date}
 Loss Date: {loss_date}
 Inspection Location: {loc_loss} Auto Works
 Assessor Name: Anita Sharma
@@ -167,52 +137,116 @@ RC No: {rc_no}
 DL No: {dl_no}
 Injuries Reported: {inj_loss}
 Estimated Damage Cost: ₹{loss_cost}
-Approved Repair Amount: ₹{int(loss_cost*0.9)}
+Approved Repair Amount: ₹{approved_cost}
 Total Loss: {total_loss}
-Claim Status: {"Under Review" if risky else "Approved"}
-Comments: {'Discrepancies noted across documents.' if risky else 'Minor rear collision; claim approved.'}
+Claim Status: {status}
+Comments: {comments}
 """.strip()
 
-    # Filenames (include short id for mapping; include SAFE/RISK hint for human inspection only)
-    tag = "SAFE" if not risky else "RISK"
-    acord_name = f"{short}_{tag}_acord.pdf"  # we put short id in name, but text contains long id for parser
-    police_name = f"{pr}_{short}_{tag}_police.pdf"
-    loss_name = f"{short}_{tag}_loss.pdf"
-
-    # RC/DL docs (with extra random content)
-    rc_text = f"""
+RC_TMPL = """
 Vehicle Registration Certificate
 -------------------------------
 Claim ID: {short}
 RC No: {rc_no}
 Registration: {reg_acord}
-Owner: {random.choice(['A. Sharma','V. Nair','R. Singh','P. Iyer','S. Khan','D. Patel'])}
-Vehicle Model: {random.choice(['Maruti Swift','Hyundai i20','Honda City','Tata Nexon','Kia Seltos'])}
-Manufacture Year: {random.randint(2015, 2024)}
-Fuel Type: {random.choice(['Petrol','Diesel','CNG'])}
-Color: {random.choice(['White','Black','Silver','Blue'])}
+Owner: {owner}
+Vehicle Model: {vehicle_model}
+Manufacture Year: {year}
+Fuel Type: {fuel}
+Color: {color}
 Notes: Verified by RTO.
 """.strip()
 
-    dl_text = f"""
+DL_TMPL = """
 Driver License
 --------------
 Claim ID: {short}
 DL No: {dl_no}
-Name: {random.choice(['Rahul Mehta','Priya Sharma','Arjun Verma','Neha Gupta','Kiran Rao','Deepak Joshi'])}
-DOB: {(datetime(1980,1,1) + timedelta(days=random.randint(0,15000))).strftime('%Y-%m-%d')}
-Address: {random.choice(['MG Road','FC Road','Ring Road','Park Street'])}, {random.choice(['Mumbai','Pune','Delhi','Bengaluru'])}
-Valid From: {(datetime(2018,1,1) + timedelta(days=random.randint(0,365))).strftime('%Y-%m-%d')}
-Valid To: {(datetime(2023,1,1) + timedelta(days=random.randint(365, 8*365))).strftime('%Y-%m-%d')}
+Name: {dl_holder}
+DOB: {dob}
+Address: {street}, {address_city}
+Valid From: {valid_from}
+Valid To: {valid_to}
 Issuing Authority: {state} RTO
 Remarks: Clean record.
 """.strip()
 
-    _write_pdf(ACCORD_DIR / acord_name, acord_text)
-    _write_pdf(POLICE_DIR / police_name, police_text)
-    _write_pdf(LOSS_DIR / loss_name, loss_text)
-    _write_pdf(RC_DIR / f"{short}_{tag}_rc.pdf", rc_text)
-    _write_pdf(DL_DIR / f"{short}_{tag}_dl.pdf", dl_text)
+
+def _make_docs(i: int, risky: bool, d: Dict, engine: str, bundle: bool = False) -> List[Tuple[str, bytes]]:
+    short, long_acord, pr = _make_identifiers(i)
+    # RC/DL numbers
+    state = d["state"]
+
+    # Dates
+    base_date = datetime(2025, 10, 5) + timedelta(days=i % 10)
+    inc_date = base_date.strftime("%Y-%m-%d")
+    loss_date = (base_date + timedelta(days=14)).strftime("%Y-%m-%d") if risky else inc_date  # 14-day gap
+
+    # Locations and registration
+    loc_acord, loc_police, loc_loss = _sample_location_pair(risky, d)
+    reg_acord = _reg_plate(i, 0)
+    reg_other = _reg_plate(i, 1) if risky else reg_acord
+
+    # Damage costs
+    base_cost = 120000 + (i % 7) * 3000
+    # risky: large discrepancy; safe: within ~2%
+    loss_cost = int(base_cost * 0.4) if risky else base_cost - 1500
+
+    fields = {
+        "short": short,
+        "long_acord": long_acord,
+        "pr": pr,
+        "policy_no": 400000 + i,
+        "contact_no": 10000 + i,
+        "state": state,
+        "rc_no": f"RC-{state}-{d['rc_num']}",
+        "dl_no": f"DL-{state}-2025-{d['dl_num']}",
+        "inc_date": inc_date,
+        "loss_date": loss_date,
+        "report_date": (base_date + timedelta(days=1)).strftime("%Y-%m-%d"),
+        "insp_date": (base_date + timedelta(days=7)).strftime("%Y-%m-%d"),
+        "loc_acord": loc_acord,
+        "loc_police": loc_police,
+        "loc_loss": loc_loss,
+        "reg_acord": reg_acord,
+        "reg_police": reg_other,
+        "reg_loss": reg_other,
+        "inj_acord": "True",
+        "inj_police": "True",
+        "inj_loss": "False" if risky else "True",
+        "photos": 5 + (i % 3),
+        "acord_cost": base_cost,
+        "police_cost": int(base_cost * 1.3) if risky else base_cost,
+        "loss_cost": loss_cost,
+        "approved_cost": int(loss_cost * 0.9),
+        "total_loss": "False",
+        "status": "Under Review" if risky else "Approved",
+        "comments": "Discrepancies noted across documents." if risky else "Minor rear collision; claim approved.",
+        "dob": (datetime(1980, 1, 1) + timedelta(days=d["dob_days"])).strftime("%Y-%m-%d"),
+        "valid_from": (datetime(2018, 1, 1) + timedelta(days=d["valid_from_days"])).strftime("%Y-%m-%d"),
+        "valid_to": (datetime(2023, 1, 1) + timedelta(days=d["valid_to_days"])).strftime("%Y-%m-%d"),
+        **{k: d[k] for k in ("owner", "vehicle_model", "year", "fuel", "color", "dl_holder", "street", "address_city")},
+    }
+
+    # Filenames (include short id for mapping; include SAFE/RISK hint for human inspection only)
+    tag = "SAFE" if not risky else "RISK"
+    acord_name = f"{short}_{tag}_acord.pdf"  # we put short id in name, but text contains long id for parser
+    police_name = f"{pr}_{short}_{tag}_police.pdf"
+    loss_name = f"{short}_{tag}_loss.pdf"
+
+    docs = [
+        (ACCORD_DIR / acord_name, ACORD_TMPL.format_map(fields)),
+        (POLICE_DIR / police_name, POLICE_TMPL.format_map(fields)),
+        (LOSS_DIR / loss_name, LOSS_TMPL.format_map(fields)),
+        (RC_DIR / f"{short}_{tag}_rc.pdf", RC_TMPL.format_map(fields)),
+        (DL_DIR / f"{short}_{tag}_dl.pdf", DL_TMPL.format_map(fields)),
+    ]
+    # Bundle mode hands the bytes back so the parent appends them to one archive
+    if bundle:
+        return [(p.relative_to(DATASET).as_posix(), render_pdf(text.splitlines(), engine)) for p, text in docs]
+    for p, text in docs:
+        write_pdf(p, text.splitlines(), engine)
+    return []
 
 
 def main():
@@ -221,34 +255,43 @@ def main():
     ap.add_argument("--risk", type=int, default=20, help="Number of RISK (mismatched) claim triplets")
     ap.add_argument("--clean", action="store_true", help="Remove existing generated PDFs before creating new ones")
     ap.add_argument("--seed", type=int, default=42, help="Random seed")
+    ap.add_argument("--engine", choices=ENGINES, default="raw", help="PDF writer: direct bytes (raw) or PyMuPDF (fitz)")
+    ap.add_argument("--bundle", type=Path, help="Write all PDFs into this zip archive instead of the dataset folders")
     args = ap.parse_args()
 
-    random.seed(args.seed)
     safe_n = args.safe
     risk_n = args.risk
     total = safe_n + risk_n
 
-    if args.clean:
+    if args.bundle:
+        pass  # bundle mode writes only the zip; the dataset folders are left as they are
+    elif args.clean:
+        # Whole-folder removal instead of one unlink per PDF
+        for folder in (ACCORD_DIR, POLICE_DIR, LOSS_DIR, RC_DIR, DL_DIR):
+            shutil.rmtree(folder, ignore_errors=True)
+            folder.mkdir(parents=True, exist_ok=True)
+    else:
+        # Also remove prior SAFE/RISK files if present
         for folder in (ACCORD_DIR, POLICE_DIR, LOSS_DIR, RC_DIR, DL_DIR):
-            for p in folder.glob("*.pdf"):
+            for p in list(folder.glob("*SAFE*.pdf")) + list(folder.glob("*RISK*.pdf")):
                 try:
                     p.unlink()
                 except Exception:
                     pass
 
-    # Also remove prior SAFE/RISK files if present
-    for folder in (ACCORD_DIR, POLICE_DIR, LOSS_DIR, RC_DIR, DL_DIR):
-        for p in list(folder.glob("*SAFE*.pdf")) + list(folder.glob("*RISK*.pdf")):
-            try:
-                p.unlink()
-            except Exception:
-                pass
-
-    # Generate
-    for i in range(1, safe_n + 1):
-        _make_docs(i, risky=False)
-    for i in range(safe_n + 1, total + 1):
-        _make_docs(i, risky=True)
+    # Generate: randomness drawn up front, then one task per claim fanned out across processes
+    draws = _draw_batch(np.random.default_rng(args.seed), total)
+    risky_flags = [i > safe_n for i in range(1, total + 1)]
+    with executor_for(args.engine) as ex:
+        results = ex.map(_make_docs, range(1, total + 1), risky_flags, draws,
+                         [args.engine] * total, [bool(args.bundle)] * total, chunksize=8)
+        if args.bundle:
+            with ZipFile(args.bundle, "w") as zf:
+                for docs in results:
+                    for name, data in docs:
+                        zf.writestr(name, data)
+        else:
+            list(results)
 
     print(f"Generated {safe_n} SAFE and {risk_n} RISK combinations (total PDFs: {5*total}).")
 
@@ -0,0 +1,106 @@
+from __future__ import annotations
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import List
+
+import fitz  # PyMuPDF
+
+# A4 page, same geometry the generators have always used with PyMuPDF
+PAGE_W, PAGE_H = 595, 842
+TOP_Y, LINE_H, BOTTOM_MARGIN = 80, 16, 50
+FONT_SIZE = 11
+
+ENGINES = ("raw", "fitz")
+
+# Objects 1-3 never change: catalog, page tree (filled per document), Helvetica
+_CATALOG = b"<< /Type /Catalog /Pages 2 0 R >>"
+_FONT = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+_RULE = b"0.2 0.2 0.2 RG 1 w 40 %d m %d %d l S\n" % (PAGE_H - 60, PAGE_W - 40, PAGE_H - 60)
+
+
+def _encode(line: str) -> bytes:
+    # Latin-1 codes like PyMuPDF's base-14 Helvetica; anything outside it (the rupee sign, and
+    # also WinAnsi-only glyphs such as dashes and curly quotes) becomes 0xB7 exactly as PyMuPDF
+    # writes it, so extracted text is unchanged.
+    try:
+        return line.encode("latin-1")
+    except UnicodeEncodeError:
+        return b"".join(ch.encode("latin-1", errors="ignore") or b"\xb7" for ch in line)
+
+
+def _paginate(lines: List[str]) -> List[List[str]]:
+    per_page = (PAGE_H - BOTTOM_MARGIN - TOP_Y) // LINE_H + 1
+    return [lines[k:k + per_page] for k in range(0, len(lines), per_page)] or [[]]
+
+
+def render_text_pdf(lines: List[str]) -> bytes:
+    """Build a text-only PDF directly as bytes (one Helvetica font, left-aligned lines)."""
+    pages = _paginate(lines)
+    objs: List[bytes] = [_CATALOG, b"", _FONT]
+    kids = []
+    for page_lines in pages:
+        ops = [_RULE, b"BT /F1 %d Tf %d TL 50 %d Td\n" % (FONT_SIZE, LINE_H, PAGE_H - TOP_Y)]
+        for line in page_lines:
+            ops.append(b"<%s> Tj T*\n" % _encode(line).hex().encode())
+        ops.append(b"ET\n")
+        content = b"".join(ops)
+        objs.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        content_ref = len(objs)
+        objs.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % (PAGE_W, PAGE_H, content_ref)
+        )
+        kids.append(b"%d 0 R" % len(objs))
+    objs[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objs, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (num, body)
+    xref_at = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref_at)
+    return bytes(out)
+
+
+def _render_fitz(lines: List[str]) -> bytes:
+    # A fresh document per render: reusing one is unsafe, since tobytes(garbage=...) renumbers its
+    # objects while PyMuPDF keeps the old font xref cached, so later outputs reference a non-font.
+    doc = fitz.open()
+    page = doc.new_page()
+    page.draw_line((40, 60), (page.rect.width - 40, 60), color=(0.2, 0.2, 0.2), width=1)
+    y = TOP_Y
+    for line in lines:
+        page.insert_text((50, y), line, fontsize=FONT_SIZE)
+        y += LINE_H
+        if y > page.rect.height - BOTTOM_MARGIN:
+            page = doc.new_page()
+            page.draw_line((40, 60), (page.rect.width - 40, 60), color=(0.2, 0.2, 0.2), width=1)
+            y = TOP_Y
+    # Serialize in memory; the caller does a single write
+    with doc:
+        return doc.tobytes()
+
+
+def render_pdf(lines: List[str], engine: str = "raw") -> bytes:
+    """Return the PDF for ``lines`` as bytes using the raw writer or PyMuPDF."""
+    return _render_fitz(lines) if engine == "fitz" else render_text_pdf(lines)
+
+
+def write_pdf(path: Path, lines: List[str], engine: str = "raw") -> None:
+    """Write ``lines`` to a one-font PDF at ``path`` with one buffered write."""
+    path.write_bytes(render_pdf(lines, engine))
+
+
+def executor_for(engine: str) -> Executor:
+    """Pool for the generators: threads on a free-threaded build with the raw engine, else processes."""
+    # The raw writer is pure Python, so threads only scale once the GIL is gone; PyMuPDF is not
+    # thread-safe, so the fitz engine always gets processes.
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    if engine == "raw" and not gil_enabled:
+        return ThreadPoolExecutor(max_workers=os.cpu_count())
+    return ProcessPoolExecutor(max_workers=os.cpu_count())
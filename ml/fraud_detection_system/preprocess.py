@@ -3,7 +3,7 @@ import re
 from dataclasses import dataclass, asdict
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 
 import fitz  # PyMuPDF
 import pandas as pd
@@ -33,10 +33,12 @@ OUT_DIR.mkdir(parents=True, exist_ok=True)
 # PDF text extraction
 # -----------------------------
 
-def extract_text_from_pdf(path: Path) -> str:
+def extract_text_from_pdf(src: Union[Path, bytes]) -> str:
+    """Extract page text from a PDF given its path or its raw bytes."""
     text_parts: List[str] = []
     try:
-        with fitz.open(path) as doc:
+        doc = fitz.open(stream=src, filetype="pdf") if isinstance(src, (bytes, bytearray)) else fitz.open(src)
+        with doc:
             for page in doc:  # type: ignore[attr-defined]
                 text_parts.append(page.get_text("text"))
     except Exception as e:
@@ -438,6 +440,15 @@ def build_features(ac: pd.Series, pr: Optional[pd.Series], lr: Optional[pd.Serie
     }
 
 
+def _by_claim(df: pd.DataFrame) -> Dict[str, Dict]:
+    """Map claim_short_id (from the file path) to that document's fields as a plain dict; later files win."""
+    if df.empty:
+        return {}
+    keyed = df.assign(claim_short_id=df["path"].str.extract(r"(CLM-\d{4}-\d{4})")[0])
+    keyed = keyed[keyed["claim_short_id"].notna()].drop_duplicates("claim_short_id", keep="last")
+    return keyed.set_index("claim_short_id").to_dict(orient="index")
+
+
 def main(output_merged: Path | None = None):
     output_merged = output_merged or (OUT_DIR / "merged_dataset.csv")
 
@@ -460,37 +471,14 @@ def main(output_merged: Path | None = None):
         df_hb.to_csv(OUT_DIR / "hospital_manifest.csv", index=False)
 
     # Build maps for join (claim_short_id inferred from file path like CLM-2025-0001)
-    df_pr_claim = df_pr.assign(claim_short_id=df_pr["path"].str.extract(r"(CLM-\d{4}-\d{4})")[0])
-    df_lr_claim = df_lr.assign(claim_short_id=df_lr["path"].str.extract(r"(CLM-\d{4}-\d{4})")[0])
-    pr_by_claim = {}
-    for claim, s in df_pr_claim.set_index("claim_short_id").iterrows():
-        if pd.notna(claim):
-            pr_by_claim[str(claim)] = s
-    lr_by_claim = {}
-    for claim, s in df_lr_claim.set_index("claim_short_id").iterrows():
-        if pd.notna(claim):
-            lr_by_claim[str(claim)] = s
-    rc_by_claim = {}
-    if not df_rc.empty:
-        df_rc_claim = df_rc.assign(claim_short_id=df_rc["path"].str.extract(r"(CLM-\d{4}-\d{4})")[0])
-        for claim, s in df_rc_claim.set_index("claim_short_id").iterrows():
-            if pd.notna(claim):
-                rc_by_claim[str(claim)] = s
-    dl_by_claim = {}
-    if not df_dl.empty:
-        df_dl_claim = df_dl.assign(claim_short_id=df_dl["path"].str.extract(r"(CLM-\d{4}-\d{4})")[0])
-        for claim, s in df_dl_claim.set_index("claim_short_id").iterrows():
-            if pd.notna(claim):
-                dl_by_claim[str(claim)] = s
-    hb_by_claim = {}
-    if not df_hb.empty:
-        df_hb_claim = df_hb.assign(claim_short_id=df_hb["path"].str.extract(r"(CLM-\d{4}-\d{4})")[0])
-        for claim, s in df_hb_claim.set_index("claim_short_id").iterrows():
-            if pd.notna(claim):
-                hb_by_claim[str(claim)] = s
+    pr_by_claim = _by_claim(df_pr)
+    lr_by_claim = _by_claim(df_lr)
+    rc_by_claim = _by_claim(df_rc)
+    dl_by_claim = _by_claim(df_dl)
+    hb_by_claim = _by_claim(df_hb)
 
     rows: List[Dict] = []
-    for _, ac in df_ac.iterrows():
+    for ac in df_ac.to_dict("records"):
         claim_short = ac.get("claim_short_id")
         pr = pr_by_claim.get(claim_short)
         lr = lr_by_claim.get(claim_short)
@@ -1,4 +1,8 @@
 from __future__ import annotations
+import importlib.util
+import os
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional
 
@@ -12,6 +16,10 @@ OUT_DIR = BASE / 'data'
 OUT_DIR.mkdir(exist_ok=True, parents=True)
 
 CATEGORIES = ['accident','health']
+# Columnar copy of the merged dataset (zstd Parquet) for train_model, when pyarrow is installed
+WRITE_PARQUET = importlib.util.find_spec('pyarrow') is not None
+# Normalized short claim id (CLM-YYYY-NNNN), compiled once for every str.extract
+_CLAIM_RE = re.compile(r'(CLM-\d{4}-\d{4})')
 SUBFOLDERS = {
     'acord': 'accord_form_100',
     'police': 'police_reports_100',
@@ -22,73 +30,92 @@ SUBFOLDERS = {
 }
 
 
-def _process_folder(folder: Path, source: str) -> pd.DataFrame:
-    rows: List[Dict] = []
-    for p in sorted(folder.glob('*.pdf')):
-        text = extract_text_from_pdf(p)
-        fields = extract_fields_from_text(text, source)
-        fields.update({'path': str(p)})
-        rows.append(fields)
+def _extract_one(p: Path, source: str) -> Dict:
+    fields = extract_fields_from_text(extract_text_from_pdf(p), source)
+    fields.update({'path': str(p)})
+    return fields
+
+
+def _process_folder(folder: Path, source: str, ex: Executor) -> pd.DataFrame:
+    # Files are independent; parse them across the pool (map keeps sorted order).
+    # One scandir pass; sorting the names keeps the merged CSV row order stable.
+    with os.scandir(folder) as it:
+        paths = [Path(p) for p in sorted(e.path for e in it if e.name.endswith('.pdf'))]
+    rows: List[Dict] = list(ex.map(_extract_one, paths, [source] * len(paths), chunksize=8))
     return pd.DataFrame(rows)
 
 
-def _merge_category(cat: str) -> pd.DataFrame:
+def _merge_category(cat: str, ex: Executor) -> pd.DataFrame:
     cat_root = DATASET / cat
-    df_ac = _process_folder(cat_root / SUBFOLDERS['acord'], 'acord')
-    df_pr = _process_folder(cat_root / SUBFOLDERS['police'], 'police') if cat == 'accident' and (cat_root / SUBFOLDERS['police']).exists() else pd.DataFrame()
-    df_lr = _process_folder(cat_root / SUBFOLDERS['loss'], 'loss')
-    df_rc = _process_folder(cat_root / SUBFOLDERS['rc'], 'rc') if (cat_root / SUBFOLDERS['rc']).exists() else pd.DataFrame()
-    df_dl = _process_folder(cat_root / SUBFOLDERS['dl'], 'dl') if (cat_root / SUBFOLDERS['dl']).exists() else pd.DataFrame()
-    df_hb = _process_folder(cat_root / SUBFOLDERS['hospital'], 'hospital') if (cat_root / SUBFOLDERS['hospital']).exists() else pd.DataFrame()
-
-    # Build lookup by normalized claim_short_id (CLM-YYYY-NNNN) to align across sources
+    df_ac = _process_folder(cat_root / SUBFOLDERS['acord'], 'acord', ex)
+    if df_ac.empty:
+        # No ACORD forms means no claims to merge (and no 'path' column to key on)
+        return pd.DataFrame()
+    df_pr = _process_folder(cat_root / SUBFOLDERS['police'], 'police', ex) if cat == 'accident' and (cat_root / SUBFOLDERS['police']).exists() else pd.DataFrame()
+    df_lr = _process_folder(cat_root / SUBFOLDERS['loss'], 'loss', ex)
+    df_rc = _process_folder(cat_root / SUBFOLDERS['rc'], 'rc', ex) if (cat_root / SUBFOLDERS['rc']).exists() else pd.DataFrame()
+    df_dl = _process_folder(cat_root / SUBFOLDERS['dl'], 'dl', ex) if (cat_root / SUBFOLDERS['dl']).exists() else pd.DataFrame()
+    df_hb = _process_folder(cat_root / SUBFOLDERS['hospital'], 'hospital', ex) if (cat_root / SUBFOLDERS['hospital']).exists() else pd.DataFrame()
+
+    # Normalized claim_short_id (CLM-YYYY-NNNN) is the join key across sources
     def ensure_claim_short(df: pd.DataFrame) -> pd.DataFrame:
-        out = df.copy()
-        # Prefer parsed claim_short_id if present, else derive from path without category suffix
-        if 'claim_short_id' not in out.columns:
-            out['claim_short_id'] = None
-        path_short = out['path'].str.extract(r'(CLM-\d{4}-\d{4})')[0]
-        out['claim_short_id'] = out['claim_short_id'].fillna(path_short)
-        return out
-
-    df_pr_claim = ensure_claim_short(df_pr) if not df_pr.empty else pd.DataFrame(columns=['claim_short_id'])
-    df_lr_claim = ensure_claim_short(df_lr)
-
-    pr_by = {str(k): s for k, s in df_pr_claim.set_index('claim_short_id').iterrows() if pd.notna(k)} if not df_pr_claim.empty else {}
-    lr_by = {str(k): s for k, s in df_lr_claim.set_index('claim_short_id').iterrows() if pd.notna(k)}
-    rc_by = {}
-    dl_by = {}
-    if not df_rc.empty:
-        df_rc_claim = df_rc.assign(claim_short_id=df_rc['path'].str.extract(r'(CLM-\d{4}-\d{4})')[0])
-        rc_by = {str(k): s for k, s in df_rc_claim.set_index('claim_short_id').iterrows() if pd.notna(k)}
-    if not df_dl.empty:
-        df_dl_claim = df_dl.assign(claim_short_id=df_dl['path'].str.extract(r'(CLM-\d{4}-\d{4})')[0])
-        dl_by = {str(k): s for k, s in df_dl_claim.set_index('claim_short_id').iterrows() if pd.notna(k)}
-    hb_by = {}
-    if not df_hb.empty:
-        df_hb_claim = df_hb.assign(claim_short_id=df_hb['path'].str.extract(r'(CLM-\d{4}-\d{4})')[0])
-        hb_by = {str(k): s for k, s in df_hb_claim.set_index('claim_short_id').iterrows() if pd.notna(k)}
+        # Prefer parsed claim_short_id if present, else derive from path without category suffix.
+        # assign only adds the one column; no full-frame copy.
+        parsed = df.get('claim_short_id', pd.Series(None, index=df.index, dtype=object))
+        return df.assign(claim_short_id=parsed.fillna(df['path'].str.extract(_CLAIM_RE)[0]))
+
+    def path_short(df: pd.DataFrame) -> pd.DataFrame:
+        return df.assign(claim_short_id=df['path'].str.extract(_CLAIM_RE)[0])
+
+    others = {
+        'police': ensure_claim_short(df_pr) if not df_pr.empty else pd.DataFrame(),
+        'loss': ensure_claim_short(df_lr),
+        'rc': path_short(df_rc) if not df_rc.empty else pd.DataFrame(),
+        'dl': path_short(df_dl) if not df_dl.empty else pd.DataFrame(),
+        'hospital': path_short(df_hb) if not df_hb.empty else pd.DataFrame(),
+    }
+
+    # Prefer short id on ACORD (from text if present) else from filename (normalize)
+    parsed = df_ac.get('claim_short_id', pd.Series(None, index=df_ac.index, dtype=object))
+    fn = df_ac['path'].map(lambda p: Path(p).name.split('_')[0])
+    fn_short = fn.str.extract(_CLAIM_RE)[0].fillna(fn)
+    ac = df_ac.assign(claim_short_id=parsed.mask(parsed.isna() | (parsed == ''), fn_short))
+
+    # Left-join every other source on claim_short_id; columns are prefixed per source.
+    # object dtype keeps the parsed values as-is (no int -> float upcast from unmatched rows).
+    merged = ac
+    for name, df in others.items():
+        if df.empty:
+            continue
+        df = df[df['claim_short_id'].notna()].drop_duplicates('claim_short_id', keep='last').astype(object)
+        df = df.add_prefix(f'{name}__').rename(columns={f'{name}__claim_short_id': 'claim_short_id'})
+        merged = merged.merge(df, on='claim_short_id', how='left')
+
+    # Column positions per source, resolved once so each row is just tuple indexing
+    cols = list(merged.columns)
+    ac_pos = [(k, cols.index(k)) for k in ac.columns]
+    src_pos = {}
+    for name in others:
+        prefix = f'{name}__'
+        fields = [(k[len(prefix):], i) for i, k in enumerate(cols) if k.startswith(prefix)]
+        src_pos[name] = (cols.index(prefix + 'path') if fields else None, fields)
+
+    def split(row: tuple, name: str) -> Optional[Dict]:
+        # The source matched iff its path came through the join
+        path_i, fields = src_pos[name]
+        if path_i is None or pd.isna(row[path_i]):
+            return None
+        return {k: row[i] for k, i in fields}
 
     rows: List[Dict] = []
-    for _, ac in df_ac.iterrows():
-        # Prefer short id on ACORD (from text if present) else from filename (normalize)
-        claim_short = ac.get('claim_short_id')
-        if not claim_short:
-            # normalize to CLM-YYYY-NNNN
-            from re import search
-            fn = Path(ac.get('path','')).name.split('_')[0]
-            m = search(r'(CLM-\d{4}-\d{4})', fn)
-            claim_short = m.group(1) if m else fn
-        pr = pr_by.get(claim_short)
-        lr = lr_by.get(claim_short)
-        rc = rc_by.get(claim_short)
-        dl = dl_by.get(claim_short)
-        hb = hb_by.get(claim_short)
-        feats = build_features(ac, pr, lr, rc, dl, hb)
+    for row in merged.itertuples(index=False, name=None):
+        ac_rec = {k: row[i] for k, i in ac_pos}
+        pr, lr, rc, dl, hb = (split(row, name) for name in others)
+        feats = build_features(ac_rec, pr, lr, rc, dl, hb)
         rows.append({
             'category': cat,
-            'claim_short_id': claim_short,
-            'acord_path': ac.get('path'),
+            'claim_short_id': ac_rec['claim_short_id'],
+            'acord_path': ac_rec.get('path'),
             'police_path': pr.get('path') if pr is not None else None,
             'loss_path': lr.get('path') if lr is not None else None,
             'rc_path': rc.get('path') if rc is not None else None,
@@ -102,12 +129,15 @@ def _merge_category(cat: str) -> pd.DataFrame:
 
 def main():
     all_frames: List[pd.DataFrame] = []
-    for cat in CATEGORIES:
-        df = _merge_category(cat)
-        df.to_csv(OUT_DIR / f'merged_{cat}.csv', index=False)
-        all_frames.append(df)
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+        for cat in CATEGORIES:
+            df = _merge_category(cat, ex)
+            df.to_csv(OUT_DIR / f'merged_{cat}.csv', index=False)
+            all_frames.append(df)
     merged_all = pd.concat(all_frames, ignore_index=True)
     merged_all.to_csv(OUT_DIR / 'merged_dataset_all.csv', index=False)
+    if WRITE_PARQUET:
+        merged_all.to_parquet(OUT_DIR / 'merged_dataset_all.parquet', compression='zstd', index=False)
     print(f"Wrote merged_dataset_all.csv with rows={len(merged_all)}")
 
 
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesRegressor, HistGradientBoostingClassifier, RandomForestClassifier, RandomForestRegressor
+
+from forest_infer import SKLEARN_ROWS, CompiledForest, compile_forest
+
+
+def _data(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.random((n, 6))
+    X[:, 2] = rng.integers(0, 2, n)  # 0/1 match flag, like the real feature matrix
+    X[:, 3] = np.round(X[:, 3], 1)  # few distinct values -> shared thresholds
+    X[rng.random((n, 6)) < 0.05] = np.nan
+    y = np.nan_to_num(X[:, 0]) + np.nan_to_num(X[:, 1] * X[:, 2])
+    return X, y
+
+
+@pytest.fixture(scope="module")
+def forests():
+    X, y = _data()
+    clf = RandomForestClassifier(n_estimators=15, random_state=0).fit(X, np.digitize(y, [0.5, 1.0]))
+    reg = RandomForestRegressor(n_estimators=15, random_state=0).fit(X, y)
+    et = ExtraTreesRegressor(n_estimators=10, max_depth=6, random_state=0).fit(X, y)
+    return clf, reg, et
+
+
+def test_matches_sklearn(forests):
+    clf, reg, et = forests
+    X, _ = _data(n=SKLEARN_ROWS, seed=1)
+    c = compile_forest(clf)
+    assert isinstance(c, CompiledForest)
+    np.testing.assert_array_equal(c.predict_proba(X), clf.predict_proba(X))
+    np.testing.assert_array_equal(c.predict(X), clf.predict(X))
+    for model in (reg, et):
+        np.testing.assert_array_equal(compile_forest(model).predict(X), model.predict(X))
+    # single claim, the app's hot path
+    np.testing.assert_array_equal(c.predict_proba(X[:1]), clf.predict_proba(X[:1]))
+
+
+def test_large_batches_use_sklearn(forests):
+    clf, _, _ = forests
+    X, _ = _data(n=SKLEARN_ROWS + 1, seed=2)
+    np.testing.assert_array_equal(compile_forest(clf).predict(X), clf.predict(X))
+
+
+def test_predict_proba_only_for_classifiers(forests):
+    clf, reg, _ = forests
+    assert hasattr(compile_forest(clf), "predict_proba")
+    assert not hasattr(compile_forest(reg), "predict_proba")
+
+
+def test_rejects_bad_shapes(forests):
+    clf, reg, _ = forests
+    X, _ = _data(n=3)
+    with pytest.raises(ValueError, match="Expected 2D array"):
+        compile_forest(reg).predict(X[0])
+    with pytest.raises(ValueError, match="expecting 6 features"):
+        compile_forest(clf).predict_proba(X[:, :5])
+
+
+def test_other_models_pass_through():
+    X, y = _data(n=100)
+    hgb = HistGradientBoostingClassifier(max_iter=5).fit(X, y > 0.5)
+    assert compile_forest(hgb) is hgb
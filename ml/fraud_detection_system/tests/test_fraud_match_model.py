@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from fraud_match_model import FRAUD_WEIGHTS, fraud_score, fraud_score_batch, fraud_score_vec
+
+
+def _random_cols(n, seed=0):
+    rng = np.random.default_rng(seed)
+    cols = {k: rng.random(n) for k in FRAUD_WEIGHTS}
+    cols["date_difference_days"] = rng.integers(-15, 15, n).astype(float)
+    cols["injury_mismatch"] = rng.integers(0, 2, n).astype(float)
+    # Values on a coarse grid hit exact binary halfway cases of the 3-decimal rounding
+    grid = rng.random(n) < 0.5
+    for k in ("damage_difference", "fraud_inconsistency_score", "location_match"):
+        cols[k][grid] = rng.integers(0, 9, grid.sum()) / 8
+    return cols
+
+
+def _scalar(cols):
+    keys = list(cols)
+    return np.array([fraud_score(dict(zip(keys, v))) for v in zip(*(cols[k].tolist() for k in keys))])
+
+
+def test_batch_matches_scalar():
+    cols = _random_cols(50_000)
+    np.testing.assert_array_equal(fraud_score_batch(cols), _scalar(cols))
+
+
+def test_rounding_halfway_case():
+    row = dict.fromkeys(FRAUD_WEIGHTS, 1.0)
+    row.update(damage_difference=0.125, injury_mismatch=1.0, date_difference_days=10.0, fraud_inconsistency_score=0.5)
+    batch = fraud_score_batch({k: np.array([v]) for k, v in row.items()})
+    assert batch[0] == fraud_score(row)
+
+
+def test_missing_features_use_defaults():
+    cols = _random_cols(1000, seed=1)
+    partial = {k: v for k, v in cols.items() if k not in ("patient_match", "rc_match")}
+    expected = _scalar(partial)
+    np.testing.assert_array_equal(fraud_score_batch(partial), expected)
+    np.testing.assert_array_equal(fraud_score_vec(pd.DataFrame(partial)), expected)
+
+
+def test_vec_propagates_nan_like_scalar():
+    df = pd.DataFrame(_random_cols(200, seed=2))
+    df.loc[::7, "location_match"] = np.nan
+    scalar = np.array([fraud_score(r) for r in df.to_dict("records")])
+    np.testing.assert_array_equal(fraud_score_vec(df), scalar)
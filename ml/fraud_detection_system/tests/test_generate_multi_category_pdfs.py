@@ -0,0 +1,23 @@
+import sys
+from zipfile import ZipFile
+
+import generate_multi_category_pdfs as gen
+
+
+def test_bundle_with_clean_leaves_dataset_intact(tmp_path, monkeypatch):
+    monkeypatch.setattr(gen, "DATASET", tmp_path / "dataset")
+    existing = tmp_path / "dataset" / "accident" / gen.SUBFOLDERS["accord"] / "CLM-1_SAFE_acord.pdf"
+    existing.parent.mkdir(parents=True)
+    existing.write_bytes(b"%PDF-1.4 existing")
+
+    out = tmp_path / "out.zip"
+    monkeypatch.setattr(sys, "argv", ["gen", "--safe", "1", "--risk", "1", "--clean", "--bundle", str(out)])
+    gen.main()
+
+    assert existing.read_bytes() == b"%PDF-1.4 existing"
+    # no empty dataset folders created either
+    assert sorted(p.name for p in (tmp_path / "dataset").rglob("*")) == ["CLM-1_SAFE_acord.pdf", "accident", gen.SUBFOLDERS["accord"]]
+    with ZipFile(out) as zf:
+        assert zf.testzip() is None
+        assert any(n.startswith("accident/") for n in zf.namelist())
+
@@ -0,0 +1,33 @@
+import sys
+from zipfile import ZipFile
+
+import generate_synthetic_pdfs as gen
+
+
+def _point_at(tmp_path, monkeypatch):
+    monkeypatch.setattr(gen, "DATASET", tmp_path)
+    folders = []
+    for attr in ("ACCORD_DIR", "POLICE_DIR", "LOSS_DIR", "RC_DIR", "DL_DIR"):
+        folder = tmp_path / "accident" / getattr(gen, attr).name
+        folder.mkdir(parents=True)
+        monkeypatch.setattr(gen, attr, folder)
+        folders.append(folder)
+    return folders
+
+
+def test_bundle_leaves_dataset_folders_intact(tmp_path, monkeypatch):
+    folders = _point_at(tmp_path / "dataset", monkeypatch)
+    existing = []
+    for folder in folders:
+        for name in ("CLM-1_SAFE_x.pdf", "CLM-2_RISK_x.pdf", "other.pdf"):
+            (folder / name).write_bytes(b"%PDF-1.4 existing")
+            existing.append(folder / name)
+
+    out = tmp_path / "out.zip"
+    monkeypatch.setattr(sys, "argv", ["gen", "--safe", "2", "--risk", "1", "--bundle", str(out)])
+    gen.main()
+
+    assert all(p.read_bytes() == b"%PDF-1.4 existing" for p in existing)
+    assert sorted(p for f in folders for p in f.iterdir()) == sorted(existing)
+    with ZipFile(out) as zf:
+        assert len(zf.namelist()) == 5 * 3
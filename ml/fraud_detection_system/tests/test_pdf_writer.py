@@ -0,0 +1,32 @@
+import fitz
+import pytest
+
+from pdf_writer import render_pdf, render_text_pdf
+
+LINES = [
+    "ACORD Form - Claim CLM-2024-0001",
+    "Claimant: Asha Rao  |  Policy: POL-88213",
+    "Estimated damage: ₹ 45,000 (parts & labour)",
+    "Café on 5th – \"quoted\" (parens) back\\slash",
+    "",
+]
+
+
+def _pages(pdf: bytes):
+    with fitz.open(stream=pdf, filetype="pdf") as doc:
+        return [(page.rect, page.get_text("words")) for page in doc]
+
+
+@pytest.mark.parametrize("lines", [[], LINES, LINES * 30], ids=["empty", "one-page", "multi-page"])
+def test_matches_fitz_engine(lines):
+    raw, ref = _pages(render_text_pdf(lines)), _pages(render_pdf(lines, engine="fitz"))
+    assert len(raw) == len(ref)
+    for (raw_rect, raw_words), (ref_rect, ref_words) in zip(raw, ref):
+        assert raw_rect == ref_rect
+        assert [w[4] for w in raw_words] == [w[4] for w in ref_words]
+        # same baseline and left edge for every word
+        assert [(round(w[0]), round(w[3])) for w in raw_words] == [(round(w[0]), round(w[3])) for w in ref_words]
+
+
+def test_output_is_deterministic():
+    assert render_text_pdf(LINES) == render_text_pdf(list(LINES))
@@ -0,0 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import preprocess_all
+
+
+def test_empty_acord_folder_gives_empty_frame(tmp_path, monkeypatch):
+    monkeypatch.setattr(preprocess_all, "DATASET", tmp_path)
+    for sub in preprocess_all.SUBFOLDERS.values():
+        (tmp_path / "accident" / sub).mkdir(parents=True)
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        assert preprocess_all._merge_category("accident", ex).empty
@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, f1_score
+
+from fraud_match_model import fraud_label_from_score, fraud_score
+from train_model import CSV_DTYPES, FEATURE_UNION, _classification_metrics, _read_merged, feature_arrays
+
+
+def _merged(n=400, seed=0, with_labels=True):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({name: rng.random(n) for name in FEATURE_UNION if name not in ("severity_numeric", "category_id")})
+    df["injury_mismatch"] = rng.integers(0, 2, n)
+    df["date_difference_days"] = rng.integers(0, 30, n)
+    df = df.mask(rng.random(df.shape) < 0.1)
+    df["severity_level"] = rng.choice(["Low", "Medium", "High", "Unknown", None], n)
+    df["category"] = pd.Series(rng.choice(["health", "accident", None], n)).astype("category")
+    if with_labels:
+        df["fraud_label"] = rng.integers(0, 2, n)
+    else:
+        df = df.drop(columns=["severity_level", "complexity_score"])
+    return df
+
+
+def _reference(df):
+    # The original per-frame pandas pipeline feature_arrays replaced
+    df = df.copy()
+    if "fraud_label" not in df.columns:
+        df["fraud_label"] = df.apply(lambda r: fraud_label_from_score(fraud_score(r)), axis=1)
+    if "severity_level" in df.columns:
+        df["severity_numeric"] = df["severity_level"].fillna("Low").map({"Low": 1, "Medium": 2, "High": 3})
+    cats = sorted(df["category"].dropna().unique().tolist())
+    df["category_id"] = df["category"].map({c: i for i, c in enumerate(cats)}).astype(float).fillna(-1)
+    return df.reindex(columns=FEATURE_UNION).fillna(0.0).astype(np.float32).to_numpy(), df
+
+
+@pytest.mark.parametrize("with_labels", [True, False])
+def test_feature_arrays_matches_pandas(with_labels):
+    df = _merged(with_labels=with_labels)
+    X, y_fraud, y_sev, y_cx = feature_arrays(df)
+    X_ref, ref = _reference(df)
+    assert X.dtype == np.float32 and X.flags.c_contiguous
+    np.testing.assert_array_equal(X, X_ref)
+    np.testing.assert_array_equal(y_fraud, ref["fraud_label"].astype(int))
+    if with_labels:
+        np.testing.assert_array_equal(y_sev, ref["severity_level"].fillna("Low"))
+        np.testing.assert_array_equal(y_cx, ref["complexity_score"].fillna(1.0).astype(np.float32))
+    else:
+        assert y_sev is None and y_cx is None
+
+
+@pytest.mark.parametrize("y_test,y_pred,labels", [
+    # fraud: labels from np.union1d, one class never predicted
+    (np.array([0, 1, 1, 0, 1, 1]), np.array([0, 0, 0, 0, 0, 0]), None),
+    (np.random.default_rng(0).integers(0, 2, 300), np.random.default_rng(1).integers(0, 2, 300), None),
+    # severity: string classes, one absent from both y_test and y_pred
+    (np.array(["Low", "High", "Low", "Medium"], dtype=object),
+     np.array(["Low", "Low", "Low", "High"], dtype=object),
+     np.array(["High", "Low", "Medium", "Unknown"], dtype=object)),
+])
+def test_classification_metrics_match_sklearn(y_test, y_pred, labels):
+    if labels is None:
+        labels = np.union1d(y_test, y_pred)
+    m = _classification_metrics(y_test, y_pred, labels)
+    assert m["accuracy"] == pytest.approx(accuracy_score(y_test, y_pred))
+    assert m["f1_weighted"] == pytest.approx(f1_score(y_test, y_pred, average="weighted", zero_division=0))
+    expected = classification_report(y_test, y_pred, output_dict=True, zero_division=0)
+    assert m["report"].keys() == expected.keys()
+    for key, value in expected.items():
+        assert m["report"][key] == pytest.approx(value), key
+    assert m["confusion_matrix"] == confusion_matrix(y_test, y_pred, labels=labels).tolist()
+
+
+def test_read_merged_parquet_matches_csv(tmp_path):
+    pytest.importorskip("pyarrow")
+    df = _merged(n=50).drop(columns=["category"]).assign(category="health", claim_short_id="CLM-2024-0001")
+    ints = [c for c, t in CSV_DTYPES.items() if t.startswith("int") and c in df.columns]
+    df[ints] = df[ints].fillna(0).astype(int)
+    src = tmp_path / "merged_dataset_all.csv"
+    df.to_csv(src, index=False)
+    from_csv = _read_merged(src)
+
+    pq_path = src.with_suffix(".parquet")
+    df.to_parquet(pq_path, index=False)
+    pd.testing.assert_frame_equal(_read_merged(src), from_csv)
+
+    # A Parquet file with other columns (the old narrow cache) is ignored even when newer
+    df[["fraud_label"]].to_parquet(pq_path, index=False)
+    pd.testing.assert_frame_equal(_read_merged(src), from_csv)
+    # ... as is a full copy older than the CSV
+    df.iloc[:10].to_parquet(pq_path, index=False)
+    os.utime(pq_path, (0, 0))
+    pd.testing.assert_frame_equal(_read_merged(src), from_csv)
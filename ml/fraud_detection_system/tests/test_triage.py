@@ -0,0 +1,64 @@
+import random
+
+import numpy as np
+import pandas as pd
+
+from triage import triage, triage_batch, triage_df
+
+TEXTS = ["", None, "My ATTORNEY said", "illegal", "Rear-Ended at signal", "Notice Of Claim filed",
+         "rear  end", "Lawsuit pending\nREAR COLLISION"]
+MATCH_KEYS = ["location_match", "vehicle_match", "rc_match", "dl_match", "patient_match", "hospital_match"]
+
+
+def _records(n=3000, seed=1):
+    rng = random.Random(seed)
+    flag = lambda: rng.choice([0, 1, None, "yes", "false", "1", 2, True])
+    recs = []
+    for i in range(n):
+        feats = {k: rng.random() for k in MATCH_KEYS}
+        # Grid values (multiples of 1/8) hit exact rounding halfway cases
+        feats["damage_difference"] = rng.choice([rng.random(), rng.randint(0, 8) / 8])
+        feats["fraud_inconsistency_score"] = rng.choice([rng.random(), rng.randint(0, 8) / 8])
+        feats["date_difference_days"] = rng.randint(0, 20)
+        feats["injury_mismatch"] = rng.randint(0, 1)
+        if rng.random() < 0.3:
+            feats["vehicle_match"] = 1.0
+        feats["severity_level"] = rng.choice(["Low", "Medium", "High", None])
+        feats["complexity_score"] = rng.random() * 4
+        ac = {"injuries_reported": flag()}
+        pr = {"police_report_no": rng.choice(["PR-1", None, ""]), "injuries_reported": flag()}
+        lr = {"total_loss_flag": flag(), "injuries_reported": flag()}
+        recs.append((ac, pr, lr, feats, (rng.choice(TEXTS), rng.choice(TEXTS), rng.choice(TEXTS))))
+    return recs
+
+
+def _same(a, b):
+    return a == b or (a is None and (b is None or (isinstance(b, float) and np.isnan(b))))
+
+
+def test_triage_batch_matches_triage():
+    recs = _records()
+    assert triage_batch(recs) == [triage(*r) for r in recs]
+    assert triage_batch([]) == []
+
+
+def test_triage_df_matches_triage():
+    recs = _records()
+    frame = lambda j: pd.DataFrame([r[j] for r in recs], dtype=object)
+    out = triage_df(frame(0), frame(1), frame(2), pd.DataFrame([r[3] for r in recs]),
+                    pd.DataFrame([r[4] for r in recs]))
+    expected = [triage(*r) for r in recs]
+    assert list(out.columns) == list(expected[0])
+    for row, exp in zip(out.to_dict("records"), expected):
+        for k, v in exp.items():
+            assert _same(v, row[k]), (k, v, row[k])
+    # every routing team is exercised
+    assert out["routing_team"].nunique() == 7
+
+
+def test_triage_df_handles_missing_frames():
+    feats = pd.DataFrame({"damage_difference": [0.1, 0.5], "severity_level": ["High", "Low"]})
+    out = triage_df(None, None, None, feats, pd.DataFrame({"t": ["attorney", None]}))
+    ref = triage({}, {}, {}, {"damage_difference": 0.1, "severity_level": "High"}, ("attorney", None, None))
+    assert out.iloc[0]["routing_team"] == ref["routing_team"]
+    assert out.iloc[0]["litigation_score"] == ref["litigation_score"]
@@ -1,8 +1,28 @@
 from __future__ import annotations
-from typing import Dict, Optional, Tuple, List
+from typing import Dict, FrozenSet, Optional, Tuple, List
 import re
 
-from fraud_match_model import fraud_score
+import numpy as np
+import pandas as pd
+
+try:
+    # Optional: Aho-Corasick automaton scans text once for every keyword at the same time
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+from fraud_match_model import FRAUD_DEFAULTS, fraud_score, fraud_score_batch, round_score
+
+# Keyword sets (already lowercase) for the assessors; the automaton covers all of them
+_LITIGATION_KEYS = frozenset(("attorney", "legal", "lawsuit", "notice of claim"))
+_SUBRO_KEYS = frozenset(("rear collision", "rear-end", "rear end"))
+_KEYWORDS = _LITIGATION_KEYS | _SUBRO_KEYS
+_KEYWORD_AUT = None
+if ahocorasick is not None:
+    _KEYWORD_AUT = ahocorasick.Automaton()
+    for _kw in _KEYWORDS:
+        _KEYWORD_AUT.add_word(_kw, _kw)
+    _KEYWORD_AUT.make_automaton()
 
 
 def _bool(v) -> Optional[int]:
@@ -17,19 +37,21 @@ def _bool(v) -> Optional[int]:
     return None
 
 
-def _text_has(text: Optional[str], patterns: List[str]) -> bool:
-    if not text:
+def _text_has(text_lower: str, keys: FrozenSet[str]) -> bool:
+    # Both sides are already lowercase (see _combine_texts and the *_KEYS constants)
+    if not text_lower:
         return False
-    t = text.lower()
-    return any(p.lower() in t for p in patterns)
+    if _KEYWORD_AUT is not None and keys <= _KEYWORDS:
+        return any(k in keys for _, k in _KEYWORD_AUT.iter(text_lower))
+    return any(k in text_lower for k in keys)
 
 
-def _combine_texts(ac_text: Optional[str], pr_text: Optional[str], lr_text: Optional[str]) -> str:
-    return "\n".join([t for t in (ac_text or "", pr_text or "", lr_text or "") if t])
+def _combine_texts(texts: Tuple[Optional[str], Optional[str], Optional[str]]) -> str:
+    """All document texts joined and lowercased, built once per triage for every keyword check."""
+    return "\n".join(t for t in texts if t).lower()
 
 
-def assess_litigation(ac: Dict, pr: Dict, lr: Dict, feats: Dict, texts: Tuple[Optional[str], Optional[str], Optional[str]]) -> Tuple[float, bool, List[str]]:
-    ac_text, pr_text, lr_text = texts
+def assess_litigation(ac: Dict, pr: Dict, lr: Dict, feats: Dict, combined_lower: str) -> Tuple[float, bool, List[str]]:
     reasons = []
     score = 0.0
 
@@ -46,22 +68,19 @@ def assess_litigation(ac: Dict, pr: Dict, lr: Dict, feats: Dict, texts: Tuple[Op
         score += 0.15
         reasons.append("Police report present")
 
-    text_all = _combine_texts(ac_text, pr_text, lr_text)
-    if _text_has(text_all, ["attorney", "legal", "lawsuit", "notice of claim"]):
+    if _text_has(combined_lower, _LITIGATION_KEYS):
         score += 0.35
         reasons.append("Legal keywords present")
 
     flag = score >= 0.5
-    return round(min(score, 1.0), 3), flag, reasons
+    return float(round_score(min(score, 1.0))), flag, reasons
 
 
-def assess_subrogation(ac: Dict, pr: Dict, lr: Dict, feats: Dict, texts: Tuple[Optional[str], Optional[str], Optional[str]]) -> Tuple[float, bool, List[str]]:
-    ac_text, pr_text, lr_text = texts
+def assess_subrogation(ac: Dict, pr: Dict, lr: Dict, feats: Dict, combined_lower: str) -> Tuple[float, bool, List[str]]:
     reasons = []
     score = 0.0
 
-    text_all = _combine_texts(ac_text, pr_text, lr_text)
-    if _text_has(text_all, ["rear collision", "rear-end", "rear end"]):
+    if _text_has(combined_lower, _SUBRO_KEYS):
         score += 0.35
         reasons.append("Rear-end scenario")
 
@@ -80,7 +99,7 @@ def assess_subrogation(ac: Dict, pr: Dict, lr: Dict, feats: Dict, texts: Tuple[O
         reasons.append("Good doc alignment")
 
     flag = score >= 0.5
-    return round(min(score, 1.0), 3), flag, reasons
+    return float(round_score(min(score, 1.0))), flag, reasons
 
 
 def choose_routing(feats: Dict, fraud_risk: float, fraud_label: Optional[int], litigation_flag: bool, subro_flag: bool, ac: Dict, pr: Dict, lr: Dict) -> Tuple[str, str, List[str]]:
@@ -132,11 +151,25 @@ def choose_routing(feats: Dict, fraud_risk: float, fraud_label: Optional[int], l
 
 def triage(ac: Dict, pr: Dict, lr: Dict, feats: Dict, texts: Tuple[Optional[str], Optional[str], Optional[str]]) -> Dict:
     # Fraud score (heuristic); keep model-independent routing possible
-    f_score = fraud_score(feats)
+    return _triage_scored(ac, pr, lr, feats, texts, fraud_score(feats))
+
+
+def triage_batch(records: List[Tuple[Dict, Dict, Dict, Dict, Tuple[Optional[str], Optional[str], Optional[str]]]]) -> List[Dict]:
+    """``triage`` over many ``(ac, pr, lr, feats, texts)`` records, scoring fraud in one vectorized pass."""
+    cols = {
+        k: np.fromiter((float(r[3].get(k, default)) for r in records), dtype=np.float64, count=len(records))
+        for k, default in FRAUD_DEFAULTS.items()
+    }
+    scores = fraud_score_batch(cols, len(records)).tolist()
+    return [_triage_scored(*r, f_score) for r, f_score in zip(records, scores)]
+
+
+def _triage_scored(ac: Dict, pr: Dict, lr: Dict, feats: Dict, texts: Tuple[Optional[str], Optional[str], Optional[str]], f_score: float) -> Dict:
     f_label = 1 if f_score > 0.5 else 0
 
-    lit_score, lit_flag, lit_reasons = assess_litigation(ac, pr, lr, feats, texts)
-    subro_score, subro_flag, subro_reasons = assess_subrogation(ac, pr, lr, feats, texts)
+    combined_lower = _combine_texts(texts)
+    lit_score, lit_flag, lit_reasons = assess_litigation(ac, pr, lr, feats, combined_lower)
+    subro_score, subro_flag, subro_reasons = assess_subrogation(ac, pr, lr, feats, combined_lower)
 
     team, adjuster, route_reasons = choose_routing(feats, f_score, f_label, lit_flag, subro_flag, ac, pr, lr)
 
@@ -155,3 +188,99 @@ def triage(ac: Dict, pr: Dict, lr: Dict, feats: Dict, texts: Tuple[Optional[str]
         "litigation_reasons": lit_reasons,
         "subrogation_reasons": subro_reasons,
     }
+
+
+def _col(df: Optional[pd.DataFrame], name: str, index: pd.Index) -> pd.Series:
+    if df is None or name not in df.columns:
+        return pd.Series(None, index=index, dtype=object)
+    return df[name]
+
+
+def _map_unique(s: pd.Series, fn, missing) -> np.ndarray:
+    # Apply a scalar rule once per distinct value, then broadcast back (NaN/None -> missing)
+    codes, uniques = pd.factorize(s)
+    return np.array([fn(u) for u in uniques] + [missing])[codes]
+
+
+def _num(df: pd.DataFrame, name: str, default: float) -> np.ndarray:
+    if name not in df.columns:
+        return np.full(len(df), default)
+    return df[name].to_numpy(dtype=np.float64)
+
+
+def _masked_sum(terms: List[Tuple[float, np.ndarray]]) -> np.ndarray:
+    # Same left-to-right additions as the scalar assessors
+    total = np.zeros(len(terms[0][1]))
+    for weight, mask in terms:
+        total += np.where(mask, weight, 0.0)
+    return total
+
+
+# choose_routing's cascade as a priority table: (team, adjuster, reason), first match wins
+_ROUTES = (
+    ("SIU (Fraud)", "SIU Investigator", "High fraud risk"),
+    ("Litigation", "Senior BI Adjuster", "Potential litigation"),
+    ("Subrogation", "Subrogation Specialist", "Potential recovery opportunity"),
+    ("Total Loss", "Total Loss Adjuster", "Total loss flagged"),
+    ("Complex Claims", "Senior Adjuster", "High severity/complexity"),
+    ("Bodily Injury", "BI Adjuster", "Injuries reported"),
+)
+
+
+def _reasons(labels: Tuple[str, ...], masks: List[np.ndarray]) -> List[List[str]]:
+    return [[r for r, m in zip(labels, row) if m] for row in zip(*masks)]
+
+
+def triage_df(df_ac: pd.DataFrame, df_pr: pd.DataFrame, df_lr: pd.DataFrame, df_feats: pd.DataFrame, df_texts: pd.DataFrame) -> pd.DataFrame:
+    """``triage`` for a batch of claims: scores, flags and routing from vectorized rules.
+
+    Frames share one index (one row per claim); ``df_texts`` holds one text column per document.
+    Missing cells count as absent, as a missing dict key does in ``triage``.
+    """
+    idx = df_feats.index
+    injuries = np.zeros(len(idx), dtype=bool)
+    for df in (df_ac, df_pr, df_lr):
+        injuries |= _map_unique(_col(df, "injuries_reported", idx), _bool, None) == 1
+    police = _map_unique(_col(df_pr, "police_report_no", idx), bool, False).astype(bool)
+    severity = _col(df_feats, "severity_level", idx)
+    high_sev = severity.eq("High").to_numpy() | (_num(df_feats, "complexity_score", 0.0) >= 3)
+
+    texts = df_texts.fillna("").astype(str)
+    combined = texts.iloc[:, 0].str.cat([texts[c] for c in texts.columns[1:]], sep="\n").str.lower()
+    legal = combined.str.contains("|".join(map(re.escape, sorted(_LITIGATION_KEYS)))).to_numpy()
+    rear_end = combined.str.contains("|".join(map(re.escape, sorted(_SUBRO_KEYS)))).to_numpy()
+
+    lit_masks = [injuries, high_sev, police, legal]
+    lit = _masked_sum(list(zip((0.25, 0.25, 0.15, 0.35), lit_masks)))
+    damage_ok = (_num(df_feats, "damage_difference", 0.0) < 0.15) & severity.isin(["Medium", "High"]).to_numpy()
+    aligned = (_num(df_feats, "location_match", 0.0) >= 0.7) & (_num(df_feats, "vehicle_match", 0.0) == 1.0)
+    subro_masks = [rear_end, police, damage_ok, aligned]
+    subro = _masked_sum(list(zip((0.35, 0.15, 0.25, 0.25), subro_masks)))
+
+    f_score = fraud_score_batch({k: df_feats[k].to_numpy(dtype=np.float64) for k in FRAUD_DEFAULTS if k in df_feats.columns}, len(idx))
+    lit_flag, subro_flag = lit >= 0.5, subro >= 0.5
+
+    # Routing: every predicate at once, np.select keeps the first match per claim
+    total_loss = _map_unique(_col(df_lr, "total_loss_flag", idx), _bool, None) == 1
+    # fraud_label (score > 0.5) already covers choose_routing's 0.6 risk cutoff
+    conds = [f_score > 0.5, lit_flag, subro_flag, total_loss, high_sev, injuries]
+    teams, adjusters, route_reasons = zip(*_ROUTES)
+    team = np.select(conds, teams, default="Fast Track")
+    adjuster = np.select(conds, adjusters, default="Standard Adjuster")
+    reason = np.select(conds, route_reasons, default="")
+
+    return pd.DataFrame({
+        "fraud_score": f_score,
+        "fraud_label": (f_score > 0.5).astype(int),
+        "severity_level": severity.to_numpy(),
+        "complexity_score": _col(df_feats, "complexity_score", idx).to_numpy(),
+        "litigation_score": round_score(np.minimum(lit, 1.0)),
+        "litigation_flag": lit_flag,
+        "subrogation_score": round_score(np.minimum(subro, 1.0)),
+        "subrogation_flag": subro_flag,
+        "routing_team": team,
+        "adjuster": adjuster,
+        "reasons": [[r] if r else [] for r in reason.tolist()],
+        "litigation_reasons": _reasons(("Injuries reported", "High severity/complexity", "Police report present", "Legal keywords present"), lit_masks),
+        "subrogation_reasons": _reasons(("Rear-end scenario", "Police report present", "Significant damage, consistent", "Good doc alignment"), subro_masks),
+    }, index=idx)